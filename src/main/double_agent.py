@@ -144,3 +144,6 @@ for key, cpp_code in list(input_cpp_codes.items()):
     time_log[key] = time_taken
     save_output_to_json_file(str(TIME_LOG), time_log)
 
+
+# Group managers are rebuilt per program but share the factory's pooled connections
+print(f"HTTP connection reuse: {agent_factory.http_pool.stats()}")
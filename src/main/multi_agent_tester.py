@@ -1,16 +1,23 @@
+import argparse
 import os
 from pathlib import Path
-import time
 from typing import Dict
 from typing_extensions import Annotated
-import traceback
 
 # Load all required service dependencies.
 from ..services.agent_helpers import read_json_file, save_output_to_json_file
 from ..services.config_loader import load_config
 from ..services.agent_factory import AgentFactory
+from ..services.checkpoint_journal import CheckpointJournal
+from ..services.llm_response_cache import get_response_cache
+from ..services.http_client_pool import http_client_pool
+from ..services.streaming_reply import streaming_metrics
 from ..services.output_testing import run_python_tests_from_dataset
-from ..services.multi_agent_workflow_engine import create_custom_workflow
+from ..services.multi_agent_workflow_engine import (
+    create_custom_workflow,
+    run_workflow_batch,
+    run_workflow_pipeline,
+)
 from ..services.multi_agent_retry_checker import RetryConditionChecker
 
 # Load the required prompts.
@@ -36,6 +43,11 @@ TEST_OUT = OUTPUT_DIR / 'generated_tests.json'
 CRITIC_OUT = OUTPUT_DIR / 'generated_critic.json'
 STATUS_OUT = OUTPUT_DIR / 'process_status.json'
 TIME_LOG = OUTPUT_DIR / 'time_log.json'
+# Append-only record of every finished program, used by --resume
+JOURNAL_PATH = OUTPUT_DIR / 'checkpoint_journal.jsonl'
+
+# Code_Translator replies end with this block; streaming stops once it is complete
+TRANSLATED_CODE_PATTERN = r"```(python|py|python3)\n(.*?)```"
 
 INPUT_PATH = Path(__file__).resolve().parent.parent / 'inputs' / 'input_program.json'
 GROUND_TRUTH_PATH = Path(__file__).resolve().parent.parent / 'inputs' / 'ground_truth.json'
@@ -65,6 +77,7 @@ def create_agents_with_tools():
         name="Code_Translator",
         system_message=translator_message,
         llm_model="qwen_coder",
+        stream_until=TRANSLATED_CODE_PATTERN,
     )
 
     code_tester = agent_factory.create_assistant(
@@ -95,6 +108,15 @@ def create_agents_with_tools():
         "User_Proxy": user_proxy,
     }
 
+def create_phase_proxy(agents):
+    """A fresh User_Proxy, executing the same tools, for a phase that runs alongside others"""
+    user_proxy = AgentFactory({}).create_user_proxy(
+        name="User_Proxy",
+        system_messages=[user_proxy_message]
+    )
+    user_proxy.register_function(dict(agents["User_Proxy"].function_map))
+    return user_proxy
+
 def _register_testing_tools(user_proxy, code_tester):
     """Register testing tools"""
     def execute_and_compare_tests(
@@ -121,7 +143,13 @@ def _register_testing_tools(user_proxy, code_tester):
         description="Run tests on the translated Python code and compare results",
     )(execute_and_compare_tests)
 
-def main(max_items: int | None = None):
+def main(
+    max_items: int | None = None,
+    max_in_flight: int | None = None,
+    pipeline: bool = False,
+    stage_workers: Dict[str, int] | None = None,
+    resume: bool = False,
+):
     # Orchestration phase ->speakers mapping
     phase_speakers = {
         "TRANSLATION": ["Code_Translator"],
@@ -139,7 +167,7 @@ def main(max_items: int | None = None):
     # Patterns to extract relevant outputs from the agent chat history
     agent_patterns = {
         "Requirement_Engineer": r"Title:\s*.*",
-        "Code_Translator": r"```(python|py|python3)\n(.*?)```",
+        "Code_Translator": TRANSLATED_CODE_PATTERN,
         "Code_Tester": r"```\n(text|test_results)*\n(.*?)```",
         "Critic": r"```(text|review_block)\n(.*?)```",
     }
@@ -164,6 +192,8 @@ def main(max_items: int | None = None):
                 "python_code": ctx.get("translated_code", ""),
                 "test_results": ctx.get("test_results", "")
             },
+            # Retries only need the actionable part of the feedback
+            "compaction": {"test_results": "failing_tests"},
             "output_key": "translated_code",
             "max_turns": 1
         },
@@ -242,6 +272,12 @@ def main(max_items: int | None = None):
         agent_access_patterns=agent_access_patterns,
         phase_configs=phase_configs,
         retry_config=retry_config,
+        # main() only keeps the outputs; CHAT_HISTORY_SINK=spill:<dir> keeps transcripts on disk
+        history_sink=os.getenv("CHAT_HISTORY_SINK", "discard"),
+        # WORKSPACE_BACKEND=sqlite:<file> shares program state with worker processes
+        workspace_backend=os.getenv("WORKSPACE_BACKEND", "memory"),
+        # Independent phases each chat through their own User_Proxy
+        proxy_builder=create_phase_proxy,
     )
 
     # Load input data
@@ -261,52 +297,99 @@ def main(max_items: int | None = None):
     if max_items:
         items_to_process = items_to_process[:max_items]
 
-    for key, cpp_code in items_to_process:
-        print(f"Translating C++ code for key: {key}")
-        start_time = time.perf_counter()
-        try:
-            # Run the workflow
-            chat_history, outputs = run(cpp_code, key)
-
-            has_any_output = any(outputs.get(key) for key in ['translated_code', 'requirements', 'validation_results', 'test_results', 'critic_review'])
-            
-            if has_any_output:
-                status[key] = "Success"
-                end_time = time.perf_counter()
-                time_taken = end_time - start_time
-                time_log[key] = time_taken
-                # Collect outputs
-                if outputs.get('translated_code'):
-                    translations[key] = outputs['translated_code']
-                if outputs.get('requirements'):
-                    requirements[key] = outputs['requirements']
-                if outputs.get('validation_results'):
-                    validations[key] = outputs['validation_results']
-                if outputs.get('test_results'):
-                    tests[key] = outputs['test_results']
-                if outputs.get('critic_review'):
-                    critic_reviews[key] = outputs['critic_review']
-            else:
-                status[key] = "Failed"
-        except Exception as e:
-            print(f"Error processing key {key}: {e}")
-            status[key] = "Error"
-            error_details = traceback.format_exc()
-            print(f"Error details: {error_details}")
-            end_time = time.perf_counter()
-            time_taken = end_time - start_time
-            time_log[key] = time_taken
-            # Continue with next item
-            continue
-    # Save outputs
-    save_output_to_json_file(str(TIME_LOG), time_log)
-    save_output_to_json_file(str(CODE_OUT), translations)
-    save_output_to_json_file(str(REQ_OUT), requirements)
-    save_output_to_json_file(str(TEST_OUT), tests)
-    save_output_to_json_file(str(CRITIC_OUT), critic_reviews)
-    save_output_to_json_file(str(STATUS_OUT), status)
+    output_keys = ['translated_code', 'requirements', 'validation_results', 'test_results', 'critic_review']
+
+    def record_outputs(key, program_status, duration, outputs):
+        """Fold one finished program into the per-key output dicts"""
+        status[key] = program_status
+        time_log[key] = duration
+        if program_status == "Success":
+            # Collect outputs
+            if outputs.get('translated_code'):
+                translations[key] = outputs['translated_code']
+            if outputs.get('requirements'):
+                requirements[key] = outputs['requirements']
+            if outputs.get('validation_results'):
+                validations[key] = outputs['validation_results']
+            if outputs.get('test_results'):
+                tests[key] = outputs['test_results']
+            if outputs.get('critic_review'):
+                critic_reviews[key] = outputs['critic_review']
+
+    # Every finished program is journaled right away; --resume replays the journal
+    # and skips programs that already succeeded.
+    journal = CheckpointJournal(str(JOURNAL_PATH))
+    if resume:
+        records = journal.load()
+        for key, record in records.items():
+            record_outputs(key, record["status"], record["duration"], record.get("outputs", {}))
+        items_to_process = journal.pending(items_to_process, records)
+        print(f"Resuming: {len(status)} programs in journal, {len(items_to_process)} left to translate")
+    else:
+        journal.reset()
+
+    def collect_result(key, result):
+        if result["error"]:
+            print(f"Error processing key {key}")
+            print(f"Error details: {result['error']}")
+            program_status = "Error"
+        elif any(result["outputs"].get(k) for k in output_keys):
+            program_status = "Success"
+        else:
+            program_status = "Failed"
+        outputs = {k: result["outputs"][k] for k in output_keys if result["outputs"].get(k)}
+        journal.append(key, {
+            "status": program_status,
+            "duration": result["duration"],
+            "outputs": outputs,
+            "error": result["error"],
+        })
+        record_outputs(key, program_status, result["duration"], outputs)
+        print(f"Finished C++ code for key: {key} ({program_status}, {result['duration']:.1f}s)")
+
+    # Keep several programs in flight; each worker builds its own agents.
+    print(f"Translating {len(items_to_process)} C++ programs...")
+    try:
+        if pipeline:
+            # One queue per phase so every model endpoint works on some program at all times.
+            run_workflow_pipeline(
+                run,
+                items_to_process,
+                agent_builder=create_agents_with_tools,
+                stage_workers=stage_workers,
+                on_result=collect_result,
+            )
+        else:
+            run_workflow_batch(
+                run,
+                items_to_process,
+                agent_builder=create_agents_with_tools,
+                max_in_flight=max_in_flight,
+                on_result=collect_result,
+            )
+    finally:
+        # Save outputs, also when the run is interrupted
+        save_output_to_json_file(str(TIME_LOG), time_log)
+        save_output_to_json_file(str(CODE_OUT), translations)
+        save_output_to_json_file(str(REQ_OUT), requirements)
+        save_output_to_json_file(str(TEST_OUT), tests)
+        save_output_to_json_file(str(CRITIC_OUT), critic_reviews)
+        save_output_to_json_file(str(STATUS_OUT), status)
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            print(f"LLM response cache: {response_cache.stats()}")
+        print(f"Prompt sizes per phase: {run.workflow['prompt_assembler'].report()}")
+        print(f"Retry context compaction: {run.workflow['context_compactor'].report()}")
+        print(f"Streaming replies: {streaming_metrics.report()}")
+        print(f"HTTP connection reuse: {http_client_pool.stats()}")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-items", type=int, default=None, help="Translate only the first N programs")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Programs translated concurrently")
+    parser.add_argument("--pipeline", action="store_true", help="Use the per-phase stage pipeline")
+    parser.add_argument("--resume", action="store_true", help="Skip programs already completed in the checkpoint journal")
+    args = parser.parse_args()
+    main(max_items=args.max_items, max_in_flight=args.max_in_flight, pipeline=args.pipeline, resume=args.resume)
 
 
@@ -1,40 +1,84 @@
 import os
 from typing import Literal
-from autogen import AssistantAgent, GroupChat, GroupChatManager, UserProxyAgent
+from autogen import Agent, AssistantAgent, GroupChat, GroupChatManager, UserProxyAgent
+
+from .http_client_pool import http_client_pool
+from .llm_response_cache import get_response_cache
+from .streaming_reply import make_streaming_reply
 
 
 class AgentFactory:
-    def __init__(self, llm_configs, default_model="mistral", default_temp=0.3):
+    def __init__(self, llm_configs, default_model="mistral", default_temp=0.3, response_cache=None, http_pool=None):
         # Store all LLM configs
         self.llm_configs = llm_configs
         self.default_model = default_model
         self.default_temp = default_temp
         self.defaults = {}
+        # Any object with autogen's cache interface (get/set/close, context manager);
+        # defaults to the LLM_CACHE_PATH SQLite cache when configured.
+        self.response_cache = response_cache if response_cache is not None else get_response_cache()
+        # Keep-alive HTTP clients per endpoint, shared by every agent and factory in the process
+        self.http_pool = http_pool if http_pool is not None else http_client_pool
 
     def set_model_temperature(self, model_key: str, temperature: float):
         """Set temperature for a specific model configuration"""
         if model_key in self.llm_configs:
             self.llm_configs[model_key]["temperature"] = temperature
 
-    def create_assistant(self, name: str, system_message: str, llm_model: str = None):
+    def create_assistant(
+        self,
+        name: str,
+        system_message: str,
+        llm_model: str = None,
+        response_cache=None,
+        stream_until: str = None,
+    ):
+        """
+        stream_until: regex of the reply's target block (e.g. the fenced code). When set,
+        replies are streamed and generation is cancelled once the block is complete.
+        """
         # LLM config- use provided model or default "mistral" Ollama model
         model_key = llm_model or ("qwen_25_coder_35b_instruct" if name == "Code_Translator" else self.default_model)
-        config = dict(self.llm_configs[model_key])
-        
+        llm_config = self.llm_config(model_key)
+        # Responses are cached per model, sampling params, system message and messages.
+        cache = response_cache if response_cache is not None else self.response_cache
+        if cache is not None:
+            llm_config["cache"] = cache
+               
+        assistant = AssistantAgent(
+            name=name,
+            system_message=system_message,
+            llm_config=llm_config,
+        )
+        if stream_until:
+            assistant.register_reply(
+                [Agent, None],
+                make_streaming_reply(llm_config, stream_until, response_cache=cache),
+                position=0,
+            )
+        return assistant
+
+    def llm_config(self, model_key: str) -> dict:
+        """
+        autogen llm_config for model_key whose OpenAI endpoints use the factory's pooled
+        HTTP clients, so agents and group managers reuse open connections.
+        """
+        config = self.llm_configs[model_key]
+        config_list = []
+        for entry in config["config_list"]:
+            if entry.get("api_type", "openai") == "openai" and "http_client" not in entry:
+                entry = {**entry, "http_client": self.http_pool.client(entry.get("base_url"))}
+            config_list.append(entry)
+
         # Apply temperature and other settings from the config
-        llm_config = {"config_list": config["config_list"]}
+        llm_config = {"config_list": config_list}
         if "temperature" in config:
             llm_config["temperature"] = config["temperature"]
         if "timeout" in config:
             llm_config["timeout"] = config["timeout"]
         if "max_tokens" in config:
             llm_config["max_tokens"] = config["max_tokens"]
-               
-        return AssistantAgent(
-            name=name,
-            system_message=system_message,
-            llm_config=llm_config,
-        )
+        return llm_config
 
     def create_user_proxy(self, name: str, system_messages: list):
         def _is_term(msg):
@@ -65,6 +109,6 @@ class AgentFactory:
     def create_group_manager(self, groupchat, llm_config=None):
         return GroupChatManager(
             groupchat=groupchat,
-            llm_config=llm_config or self.llm_configs[self.default_model]
+            llm_config=llm_config or self.llm_config(self.default_model)
         )
 
@@ -1,33 +1,57 @@
 import json
 import re
+from functools import lru_cache
+
+PATTERN_FLAGS = re.DOTALL | re.IGNORECASE
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern):
+    """Registry of compiled extraction patterns, shared by every call"""
+    return re.compile(pattern, PATTERN_FLAGS)
+
+def _message_content(message):
+    # Support both dict and str, with None check
+    if isinstance(message, dict) and message.get('content') is not None:
+        return message['content']
+    return str(message)
 
 def extract_relevant_outputs(chat_history, agent_patterns):
     """
     Finds and returns the content of the agent messages
-    that match the specified patterns. Returns only the most recent match.
+    that match the specified patterns. Returns only the first match of the most recent
+    matching message.
+
+    Messages are scanned newest-first and, within a message, patterns last-first, so
+    the search stops at the first message with a match instead of collecting every
+    match in the history. Within that message the first block wins, which is also the
+    block a streamed reply stops after (see streaming_reply.BlockExtractor).
     """
     outputs = {}
     for agent, regex_patterns in agent_patterns.items():
         # Ensure regex_patterns is a list
         if not isinstance(regex_patterns, list):
             regex_patterns = [regex_patterns]
-        matches = []
-        for message in chat_history:
+        compiled = [compile_pattern(pattern) for pattern in regex_patterns]
+        outputs[agent] = []
+        for message in reversed(chat_history):
             # Handle None messages
             if message is None:
                 continue
-            # Support both dict and str, with None check
-            content = message.get('content', '') if isinstance(message, dict) and 'content' in message and message.get('content') is not None else str(message) if message is not None else ''
-            for pattern in regex_patterns:
-                found = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-                # Special handling for Code_Translator: extract only the code (second group)
-                if agent == "Code_Translator" and found and isinstance(found[0], tuple):
-                    matches.extend([code for (_, code) in found])
-                else:
-                    matches.extend(found)
-        
-        # Return only the last match if any matches were found, otherwise empty list
-        outputs[agent] = [matches[-1]] if matches else []
+            content = _message_content(message)
+            found = None
+            for pattern in reversed(compiled):
+                found = pattern.findall(content)
+                if found:
+                    break
+            if not found:
+                continue
+            first = found[0]
+            # Special handling for Code_Translator: extract only the code (second group)
+            if agent == "Code_Translator" and isinstance(first, tuple):
+                _, first = first
+            # Return only the first match if any matches were found, otherwise empty list
+            outputs[agent] = [first]
+            break
     return outputs
 
 def save_output_to_json_file(output_file_path, output_content):
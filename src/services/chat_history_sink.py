@@ -0,0 +1,102 @@
+import gzip
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Union
+
+class ChatHistorySink(ABC):
+    """
+    Receives the chat messages of one workflow run as they arrive.
+    extend() takes each phase's messages; messages() returns what is kept in memory
+    (nothing unless a subclass keeps messages).
+    """
+
+    @abstractmethod
+    def extend(self, messages: Iterable[dict]) -> None:
+        ...
+
+    def messages(self) -> List[dict]:
+        return []
+
+class KeepAllSink(ChatHistorySink):
+    """Keeps every message in memory (the unbounded default)"""
+
+    def __init__(self):
+        self._messages: List[dict] = []
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        self._messages.extend(messages)
+
+    def messages(self) -> List[dict]:
+        return self._messages
+
+class DiscardSink(ChatHistorySink):
+    """Drops every message"""
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        pass
+
+class LastNPerAgentSink(ChatHistorySink):
+    """Keeps the last n messages of each speaker"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self._by_agent: Dict[str, deque] = {}
+        self._order = 0
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        for message in messages:
+            name = message.get("name", "") if isinstance(message, dict) else ""
+            self._by_agent.setdefault(name, deque(maxlen=self.n)).append((self._order, message))
+            self._order += 1
+
+    def messages(self) -> List[dict]:
+        kept = [entry for entries in self._by_agent.values() for entry in entries]
+        return [message for _, message in sorted(kept, key=lambda entry: entry[0])]
+
+class SpillSink(ChatHistorySink):
+    """
+    Appends messages to a gzip-compressed JSON-lines file as they arrive and keeps
+    none in memory; read() loads them back.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        lines = [json.dumps(message, ensure_ascii=False, default=str) + "\n" for message in messages]
+        if lines:
+            # Each call adds a gzip member; readers see one continuous stream.
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.writelines(lines)
+
+    def read(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+def history_sink_factory(spec: Union[str, Callable[[str], ChatHistorySink], None]) -> Callable[[str], ChatHistorySink]:
+    """
+    Turn a sink spec into a per-program factory (program key -> sink).
+    spec is a callable, or one of "keep", "discard", "last:<n>", "spill:<directory>".
+    """
+    if callable(spec):
+        return spec
+    spec = spec or "keep"
+    if spec == "keep":
+        return lambda key: KeepAllSink()
+    if spec == "discard":
+        return lambda key: DiscardSink()
+    if spec.startswith("last:"):
+        n = int(spec.split(":", 1)[1])
+        return lambda key: LastNPerAgentSink(n)
+    if spec.startswith("spill:"):
+        directory = spec.split(":", 1)[1]
+        return lambda key: SpillSink(os.path.join(directory, re.sub(r"[^\w.-]", "_", str(key)) + ".jsonl.gz"))
+    raise ValueError(f"Unknown chat history sink: {spec}")
@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+class CheckpointJournal:
+    """
+    Append-only JSON-lines journal of finished programs for crash-safe batch runs.
+
+    Every record is one line {"key", "ts", ...record} written and fsynced as soon as a
+    program finishes, so a crash loses at most the programs still in flight. When a key
+    appears more than once the last record wins; a torn last line from a crash is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._torn_tail = self._has_torn_tail()
+
+    def _has_torn_tail(self) -> bool:
+        """True when the last line was cut off mid-write and lacks its newline"""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return False
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except FileNotFoundError:
+            return False
+
+    def append(self, key: str, record: Dict[str, Any]) -> None:
+        """Durably append the record for key"""
+        line = json.dumps({"key": key, "ts": time.time(), **record}, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self._torn_tail:
+                    # Terminate the torn line so the new record stays parseable.
+                    f.write("\n")
+                    self._torn_tail = False
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return {key: latest record}; missing journal means no records"""
+        records: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    records[record.pop("key")] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def pending(
+        self,
+        items: List[Tuple[str, Any]],
+        records: Optional[Dict[str, Dict[str, Any]]] = None,
+        done_status: str = "Success",
+    ) -> List[Tuple[str, Any]]:
+        """
+        The (key, value) items still to run on --resume: those without a record whose
+        status is done_status. records defaults to load().
+        """
+        if records is None:
+            records = self.load()
+        return [
+            (key, value) for key, value in items
+            if records.get(key, {}).get("status") != done_status
+        ]
+
+    def reset(self) -> None:
+        """Start a fresh journal"""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self._torn_tail = False
@@ -0,0 +1,251 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .execution_tracing import get_tracer
+
+default_timeout = 10
+# Per-stream cap on captured stdout/stderr; the process is killed once a stream exceeds it
+default_max_output_bytes = int(os.getenv("EXECUTION_MAX_OUTPUT_BYTES", str(1024 * 1024)))
+# Return code reported for processes killed because of the output cap
+OUTPUT_LIMIT_RETURNCODE = -3
+# Upper bound on child processes running at once in this process, across threads and event loops
+default_max_concurrency = int(os.getenv("EXECUTION_MAX_CONCURRENCY", str(min(32, os.cpu_count() or 1) * 2)))
+
+# Process-wide slots; sync callers each run their own event loop, so a loop-bound
+# asyncio.Semaphore alone would not limit them together.
+_global_slots = threading.BoundedSemaphore(default_max_concurrency)
+# Per-loop semaphores queue a loop's commands without polling for global slots
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+def set_max_concurrency(limit: int):
+    """Change the process-wide process limit; commands already running finish under the old one"""
+    global default_max_concurrency, _global_slots
+    with _semaphores_lock:
+        default_max_concurrency = max(1, limit)
+        _global_slots = threading.BoundedSemaphore(default_max_concurrency)
+        _semaphores.clear()
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(default_max_concurrency)
+            _semaphores[loop] = semaphore
+        return semaphore
+
+@asynccontextmanager
+async def _execution_slot():
+    """Hold one of the process-wide slots, waiting on the event loop rather than blocking it"""
+    async with _get_semaphore():
+        slots = _global_slots
+        delay = 0.001
+        while not slots.acquire(blocking=False):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+        try:
+            yield
+        finally:
+            slots.release()
+
+@asynccontextmanager
+async def execution_slots(count: int):
+    """
+    Hold count process-wide slots at once (capped at the limit), for work that starts its
+    own processes outside execute_command_async, like the warm Python worker forking one
+    child per test. The slots are taken all or nothing, so two such holders never wait on
+    each other's partial sets.
+    """
+    slots = _global_slots
+    count = max(1, min(count, default_max_concurrency))
+    delay = 0.001
+    while True:
+        taken = 0
+        while taken < count and slots.acquire(blocking=False):
+            taken += 1
+        if taken == count:
+            break
+        for _ in range(taken):
+            slots.release()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.05)
+    try:
+        yield
+    finally:
+        for _ in range(count):
+            slots.release()
+
+async def _read_stream(
+    stream: asyncio.StreamReader,
+    chunks: List[bytes],
+    limit: Optional[int],
+    on_overflow: Callable[[], None],
+):
+    """Collect the stream into chunks, stopping at limit bytes and calling on_overflow"""
+    size = 0
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        if limit is not None and size + len(chunk) > limit:
+            chunks.append(chunk[:limit - size])
+            on_overflow()
+            break
+        size += len(chunk)
+        chunks.append(chunk)
+
+async def _write_stdin(stream: asyncio.StreamWriter, data: bytes):
+    try:
+        if data:
+            stream.write(data)
+            await stream.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        stream.close()
+
+async def execute_command_async(
+    command: List[str],
+    input_data: str = "",
+    timeout: Optional[float] = None,
+    max_output_bytes: Optional[int] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[str, str, int, bool, bool]:
+    """
+    Executes a command as an asyncio subprocess and captures its output.
+    At most default_max_concurrency commands run at once in the process, whichever
+    thread or event loop they come from. The process is killed when the timeout (default
+    default_timeout) expires or when the awaiting task is cancelled; cancellation is
+    re-raised after cleanup.
+    stdout and stderr are streamed into buffers capped at max_output_bytes each (default
+    default_max_output_bytes, 0 disables the cap); the process is killed as soon as a
+    stream exceeds the cap and the result is flagged as truncated.
+    Returns (stdout, stderr, returncode, success, truncated).
+    """
+    timeout = default_timeout if timeout is None else timeout
+    max_output_bytes = default_max_output_bytes if max_output_bytes is None else max_output_bytes
+    limit = max_output_bytes or None
+    stdout_chunks: List[bytes] = []
+    stderr_chunks: List[bytes] = []
+    returncode = None
+    success = False
+    error_prefix = ""
+    overflowed: List[str] = []
+
+    # Add execution ID for tracking
+    tracer = get_tracer()
+    execution_id = tracer.new_execution_id()
+    input_bytes = (input_data or "").encode("utf-8")
+    tracer.event(
+        "debug", "execution.start", execution_id,
+        program=os.path.basename(command[0]) if command else "", input_bytes=len(input_bytes),
+        payload={"command": command, "input": input_data},
+    )
+
+    queued_time = time.perf_counter()
+    async with _execution_slot():
+        start_time = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+            )
+
+            def on_overflow(stream_name):
+                overflowed.append(stream_name)
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+
+            io_tasks = [
+                asyncio.ensure_future(_write_stdin(process.stdin, input_bytes)),
+                asyncio.ensure_future(_read_stream(process.stdout, stdout_chunks, limit, lambda: on_overflow("stdout"))),
+                asyncio.ensure_future(_read_stream(process.stderr, stderr_chunks, limit, lambda: on_overflow("stderr"))),
+                asyncio.ensure_future(process.wait()),
+            ]
+            try:
+                _, pending = await asyncio.wait(io_tasks, timeout=timeout)
+            except asyncio.CancelledError:
+                await _kill(process, io_tasks)
+                tracer.event("warning", "execution.cancelled", execution_id,
+                             duration=round(time.perf_counter() - start_time, 6))
+                raise
+
+            if overflowed:
+                await _kill(process, io_tasks)
+                error_prefix = (
+                    f"OutputLimitExceeded: {overflowed[0]} exceeded {max_output_bytes} bytes, process killed.\n"
+                )
+                returncode = OUTPUT_LIMIT_RETURNCODE
+                tracer.event("warning", "execution.output_limit", execution_id,
+                             stream=overflowed[0], max_output_bytes=max_output_bytes)
+            elif pending:
+                await _kill(process, io_tasks)
+                error_prefix = f"TimeoutExpired: Command took too long to execute ({timeout} seconds).\n"
+                returncode = -1
+                tracer.event("warning", "execution.timeout", execution_id, timeout=timeout)
+            else:
+                returncode = process.returncode
+                success = (returncode == 0)
+        except FileNotFoundError:
+            error_prefix = f"Error: Command not found or executable missing: {' '.join(command)}\n"
+            returncode = 127
+            tracer.event("error", "execution.not_found", execution_id, program=command[0] if command else "")
+        except Exception as e:
+            error_prefix = f"An unexpected error occurred: {e}\n"
+            returncode = -2
+            tracer.event("error", "execution.error", execution_id, error=str(e))
+        end_time = time.perf_counter()
+
+    stdout_bytes = sum(len(c) for c in stdout_chunks)
+    stderr_bytes = sum(len(c) for c in stderr_chunks)
+    stdout = b"".join(stdout_chunks).decode("utf-8", errors="replace")
+    stderr = error_prefix + b"".join(stderr_chunks).decode("utf-8", errors="replace")
+    tracer.event(
+        "info", "execution.end", execution_id,
+        program=os.path.basename(command[0]) if command else "",
+        queued=round(start_time - queued_time, 6),
+        duration=round(end_time - start_time, 6),
+        exit_code=returncode,
+        success=success,
+        stdout_bytes=stdout_bytes,
+        stderr_bytes=stderr_bytes,
+        truncated=bool(overflowed),
+        payload={"stdout": stdout, "stderr": stderr},
+    )
+    return stdout.strip(), stderr.strip(), returncode, success, bool(overflowed)
+
+async def _kill(process: asyncio.subprocess.Process, io_tasks: List[asyncio.Future]):
+    """Kill the process and let the readers drain whatever it wrote before dying"""
+    try:
+        process.kill()
+    except ProcessLookupError:
+        pass
+    await process.wait()
+    done, pending = await asyncio.wait(io_tasks, timeout=1)
+    for task in pending:
+        task.cancel()
+
+def run_sync(coro):
+    """
+    Runs a coroutine to completion from synchronous code.
+    When the calling thread already runs an event loop, the coroutine gets its own loop
+    on a helper thread so sync wrappers stay usable from async code.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+default_max_bytes = 512 * 1024 * 1024
+# Entries used within this many seconds are never evicted, so a hit cannot vanish mid-copy
+default_min_age = 300.0
+
+@lru_cache(maxsize=None)
+def compiler_version(compiler: str) -> str:
+    """Full version string of the compiler (queried once per process), "" when unknown"""
+    try:
+        completed = subprocess.run(
+            [compiler, "-dumpfullversion", "-dumpversion"], capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return completed.stdout.strip() if completed.returncode == 0 else ""
+
+class CompilationCache:
+    """
+    Persistent, content-addressed cache of C++ build artifacts (executables and
+    precompiled headers).
+
+    Entries are keyed by a hash of the source, the compiler path and version and the
+    compiler flags. Layout: <cache_dir>/<key[:2]>/<key>/<artifact files>. New entries are
+    staged in a private directory and renamed into place, so concurrent writers never
+    expose a partially written executable; the loser of a race simply discards its copy.
+    Hits are hardlinked (or copied) into the caller's directory with fetch(), so another
+    writer's eviction never removes a file that is about to run. Entry directory mtimes
+    are refreshed on every hit and used for LRU eviction once the running size estimate
+    exceeds max_bytes; entries used within the last min_age seconds are kept.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = default_max_bytes, min_age: float = default_min_age):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Bytes on disk as last scanned plus everything stored since; None until the first put
+        self._size_estimate: Optional[int] = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(code_string: str, compiler: str, flags: List[str]) -> str:
+        """Build the cache key for a source/compiler/flags combination"""
+        digest = hashlib.sha256()
+        for part in [compiler, compiler_version(compiler), "\0".join(flags), code_string]:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0\0")
+        return digest.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def fetch(self, key: str, names: List[str], dest_dir: str) -> bool:
+        """
+        Hardlink (or copy, across filesystems) the artifacts `names` of key into dest_dir.
+        Returns False on a miss, including an entry evicted while it was being fetched.
+        """
+        entry_dir = self._entry_dir(key)
+        try:
+            os.utime(entry_dir)
+            for name in names:
+                source, target = os.path.join(entry_dir, name), os.path.join(dest_dir, name)
+                if os.path.lexists(target):
+                    os.unlink(target)
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copy2(source, target)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, key: str, executable_file: str) -> str:
+        """Store a freshly compiled executable and return its cached path"""
+        entry_dir = self.put_files(key, [executable_file])
+        return os.path.join(entry_dir, os.path.basename(executable_file))
+
+    def put_files(self, key: str, files: List[str]) -> str:
+        """Store a group of build artifacts under one key and return the entry directory"""
+        entry_dir = self._entry_dir(key)
+        parent_dir = os.path.dirname(entry_dir)
+        os.makedirs(parent_dir, exist_ok=True)
+
+        staging_dir = tempfile.mkdtemp(prefix=f".{key[:8]}-{uuid.uuid4().hex[:8]}-", dir=parent_dir)
+        stored = 0
+        try:
+            for path in files:
+                shutil.copy2(path, os.path.join(staging_dir, os.path.basename(path)))
+            try:
+                os.rename(staging_dir, entry_dir)
+                stored = sum(os.path.getsize(path) for path in files)
+            except OSError:
+                # Another writer stored the same entry first; keep theirs.
+                shutil.rmtree(staging_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        with self._lock:
+            if self._size_estimate is None:
+                self._size_estimate = sum(e["size"] for e in self._entries())
+            else:
+                self._size_estimate += stored
+            over_bound = self._size_estimate > self.max_bytes
+        if over_bound:
+            self.evict()
+        return entry_dir
+
+    def _entries(self) -> List[Dict]:
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                size = 0
+                for f in os.scandir(entry.path):
+                    try:
+                        size += f.stat().st_size
+                    except OSError:
+                        pass
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                entries.append({"path": entry.path, "size": size, "mtime": mtime})
+        return entries
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits max_bytes, keeping entries
+        used within the last min_age seconds. Returns entries removed.
+        """
+        entries = self._entries()
+        total = sum(e["size"] for e in entries)
+        cutoff = time.time() - self.min_age
+        removed = 0
+        for entry in sorted(entries, key=lambda e: e["mtime"]):
+            if total <= self.max_bytes or entry["mtime"] > cutoff:
+                break
+            shutil.rmtree(entry["path"], ignore_errors=True)
+            total -= entry["size"]
+            removed += 1
+        with self._lock:
+            self._size_estimate = total
+        return removed
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process and current on-disk usage"""
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (100.0 * self.hits / lookups) if lookups else 0.0,
+            "entries": len(entries),
+            "bytes": sum(e["size"] for e in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._lock:
+            self._size_estimate = 0
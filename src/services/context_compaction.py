@@ -0,0 +1,109 @@
+import re
+import threading
+from typing import Callable, Dict, Optional, Union
+
+from .prompt_assembly import estimate_tokens
+
+_SCORE_LINE = re.compile(r"(\d+)\s*/\s*10")
+_FAILURE_LINE = re.compile(r"fail|error|mismatch|differ|assert|traceback|exception|timeout", re.IGNORECASE)
+_SUMMARY_LINE = re.compile(r"summary|total|passed|failed|count|score", re.IGNORECASE)
+_FENCE_LINE = re.compile(r"^\s*```")
+
+def review_summary(text: str, previous: Optional[str] = None, min_score: int = 8) -> str:
+    """
+    Keep the overall score and every dimension scored below min_score with its
+    explanation; dimensions that already score well are dropped.
+    """
+    kept = []
+    for line in text.splitlines():
+        if _FENCE_LINE.match(line) or not line.strip():
+            continue
+        lowered = line.lower()
+        match = _SCORE_LINE.search(line)
+        if "overall" in lowered or "report" in lowered:
+            kept.append(line.strip())
+        elif match and int(match.group(1)) < min_score:
+            kept.append(line.strip())
+        elif not match and not lowered.startswith(("output format", "detailed scores")):
+            # Free-form suggestions are kept
+            kept.append(line.strip())
+    return "\n".join(kept) if kept else text
+
+def failing_tests(text: str, previous: Optional[str] = None) -> str:
+    """Keep summary lines and the details of failing tests, dropping passing ones"""
+    kept = []
+    lines = text.splitlines()
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        if _FENCE_LINE.match(line) or not line.strip():
+            index += 1
+            continue
+        if _FAILURE_LINE.search(line):
+            kept.append(line)
+            # Keep the indented detail block that follows a failure
+            index += 1
+            while index < len(lines) and lines[index].startswith((" ", "\t")) and lines[index].strip():
+                kept.append(lines[index])
+                index += 1
+            continue
+        if _SUMMARY_LINE.search(line):
+            kept.append(line)
+        index += 1
+    return "\n".join(kept) if kept else text
+
+STRATEGIES: Dict[str, Callable[..., str]] = {
+    "review_summary": review_summary,
+    "failing_tests": failing_tests,
+}
+
+class ContextCompactor:
+    """
+    Shrinks prompt inputs on retry attempts.
+
+    A phase config lists "compaction": {prompt field: strategy}, where strategy is a
+    name from STRATEGIES or a callable (value, previous_value) -> str. Compaction only
+    applies when the phase already ran for the program, so first attempts are sent in
+    full. Tokens before and after compaction are counted per phase.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def compact(self, phase_name: str, phase_config: Dict, prompt_kwargs: Dict, previous_kwargs: Optional[Dict]) -> Dict:
+        """Return prompt_kwargs with the configured fields compacted on retries"""
+        rules: Dict[str, Union[str, Callable]] = phase_config.get("compaction") or {}
+        if not rules or previous_kwargs is None:
+            return prompt_kwargs
+
+        compacted = dict(prompt_kwargs)
+        before = after = 0
+        for field, strategy in rules.items():
+            value = prompt_kwargs.get(field)
+            if not value:
+                continue
+            compact_fn = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+            compacted[field] = compact_fn(str(value), previous_kwargs.get(field))
+            before += estimate_tokens(str(value))
+            after += estimate_tokens(compacted[field])
+
+        with self._lock:
+            stats = self._stats.setdefault(phase_name, {"retries": 0, "tokens_before": 0, "tokens_after": 0})
+            stats["retries"] += 1
+            stats["tokens_before"] += before
+            stats["tokens_after"] += after
+        return compacted
+
+    def report(self) -> Dict[str, Dict]:
+        """Per-phase tokens saved on retries"""
+        report = {}
+        with self._lock:
+            for phase_name, stats in self._stats.items():
+                saved = stats["tokens_before"] - stats["tokens_after"]
+                report[phase_name] = {
+                    **stats,
+                    "tokens_saved": saved,
+                    "avg_tokens_saved_per_retry": saved / stats["retries"] if stats["retries"] else 0.0,
+                }
+        return report
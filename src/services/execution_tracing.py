@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+class TraceSink(ABC):
+    """Destination for trace events; subclasses implement emit"""
+
+    @abstractmethod
+    def emit(self, event: Dict[str, Any]) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+class NullSink(TraceSink):
+    """Drops every event"""
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        pass
+
+class ConsoleSink(TraceSink):
+    """Prints one compact line per event"""
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        fields = " ".join(
+            f"{k}={v!r}" if isinstance(v, str) else f"{k}={v}"
+            for k, v in event.items()
+            if k not in ("ts", "level", "event", "execution_id")
+        )
+        execution_id = event.get("execution_id")
+        prefix = f"[{event['event']} {execution_id}]" if execution_id else f"[{event['event']}]"
+        print(f" {prefix} {fields}".rstrip())
+
+class JsonlSink(TraceSink):
+    """Appends events as JSON lines to a file for later analysis"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+class ExecutionTracer:
+    """
+    Leveled, sampled structured events for code execution.
+
+    Every event is a flat dict: {"ts", "level", "event", "execution_id", ...fields}.
+    Events below `level` are dropped. Executions are sampled by id with `sample_rate`,
+    so all events of a sampled execution are kept together; warnings and errors are
+    always kept. Payloads (commands, program input/output, result dicts) are only
+    attached when include_payloads is set.
+    """
+
+    def __init__(
+        self,
+        sink: Optional[TraceSink] = None,
+        level: str = "info",
+        sample_rate: float = 1.0,
+        include_payloads: bool = False,
+    ):
+        self.sink = sink or ConsoleSink()
+        self.level = LEVELS[level]
+        self.sample_rate = sample_rate
+        self.include_payloads = include_payloads
+
+    @staticmethod
+    def new_execution_id() -> str:
+        return uuid.uuid4().hex[:8]
+
+    def enabled(self, level: str) -> bool:
+        return LEVELS[level] >= self.level
+
+    def _sampled(self, execution_id: Optional[str]) -> bool:
+        if self.sample_rate >= 1.0 or execution_id is None:
+            return True
+        return int(execution_id[:8], 16) % 10000 < self.sample_rate * 10000
+
+    def event(
+        self,
+        level: str,
+        event: str,
+        execution_id: Optional[str] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        **fields: Any,
+    ) -> None:
+        """Emit an event; payload fields are added only when payloads are enabled"""
+        if not self.enabled(level):
+            return
+        if LEVELS[level] < LEVELS["warning"] and not self._sampled(execution_id):
+            return
+        record = {"ts": round(time.time(), 6), "level": level, "event": event}
+        if execution_id is not None:
+            record["execution_id"] = execution_id
+        record.update(fields)
+        if payload and self.include_payloads:
+            record.update(payload)
+        self.sink.emit(record)
+
+def _tracer_from_env() -> ExecutionTracer:
+    trace_file = os.getenv("EXECUTION_TRACE_FILE")
+    return ExecutionTracer(
+        sink=JsonlSink(trace_file) if trace_file else ConsoleSink(),
+        level=os.getenv("EXECUTION_TRACE_LEVEL", "info"),
+        sample_rate=float(os.getenv("EXECUTION_TRACE_SAMPLE", "1.0")),
+        include_payloads=os.getenv("EXECUTION_TRACE_PAYLOADS", "0") == "1",
+    )
+
+_tracer: Optional[ExecutionTracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> ExecutionTracer:
+    """Return the process-wide tracer, configured from EXECUTION_TRACE_* on first use"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = _tracer_from_env()
+        return _tracer
+
+def set_tracer(tracer: ExecutionTracer) -> None:
+    """Replace the process-wide tracer (e.g. ExecutionTracer(NullSink()) to silence execution logs)"""
+    global _tracer
+    with _tracer_lock:
+        _tracer = tracer
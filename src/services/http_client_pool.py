@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+# Connection pool sizing per endpoint
+default_max_connections = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "32"))
+default_max_keepalive = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "16"))
+default_keepalive_expiry = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "120"))
+
+_shared_client_class = None
+
+def _shared_client():
+    """
+    httpx.Client subclass whose deepcopy is the client itself, as autogen's docs ask for
+    an llm_config http_client: ConversableAgent deep-copies its llm_config, and a copied
+    (or uncopyable) client would break sharing.
+    """
+    global _shared_client_class
+    if _shared_client_class is None:
+        import httpx
+
+        class SharedHttpClient(httpx.Client):
+            def __deepcopy__(self, memo):
+                return self
+
+        _shared_client_class = SharedHttpClient
+    return _shared_client_class
+
+def _endpoint(base_url: Optional[str]) -> str:
+    """scheme://host:port of base_url; clients are shared per endpoint, not per path"""
+    if not base_url:
+        return "default"
+    parts = urlsplit(base_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class HttpClientPool:
+    """
+    Keep-alive httpx clients shared by every agent that talks to the same endpoint.
+
+    An OpenAI client built per agent opens its own connections, so every agent (and
+    every GroupChatManager) pays a TCP and TLS handshake. client(base_url) returns one
+    pooled httpx.Client per endpoint and process, to be passed as the OpenAI client's
+    http_client; autogen's deepcopy of llm_config hands back the same client. TLS
+    verification uses REQUESTS_CA_BUNDLE when set. httpcore's trace hook counts
+    requests, new connections and TLS handshakes per endpoint; stats() reports how
+    many requests reused a connection.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = default_max_connections,
+        max_keepalive: int = default_max_keepalive,
+        keepalive_expiry: float = default_keepalive_expiry,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self._lock = threading.Lock()
+        self._clients: Dict[tuple, Any] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def client(self, base_url: Optional[str]):
+        """The shared httpx.Client for base_url's endpoint in this process"""
+        endpoint = _endpoint(base_url)
+        key = (os.getpid(), endpoint)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._build(endpoint)
+            return self._clients[key]
+
+    def _build(self, endpoint: str):
+        import httpx
+
+        stats = self._stats.setdefault(endpoint, {
+            "requests": 0, "new_connections": 0, "tls_handshakes": 0, "connect_time": 0.0,
+        })
+        lock = self._lock
+        connect_started: Dict[int, float] = {}
+
+        def trace(event_name: str, info: Dict) -> None:
+            if event_name == "connection.connect_tcp.started":
+                connect_started[threading.get_ident()] = time.perf_counter()
+            elif event_name == "connection.connect_tcp.complete":
+                started = connect_started.pop(threading.get_ident(), None)
+                with lock:
+                    stats["new_connections"] += 1
+                    stats["connect_time"] += time.perf_counter() - started if started else 0.0
+            elif event_name == "connection.start_tls.complete":
+                with lock:
+                    stats["tls_handshakes"] += 1
+
+        def on_request(request) -> None:
+            request.extensions["trace"] = trace
+            with lock:
+                stats["requests"] += 1
+
+        return _shared_client()(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            # The OpenAI client passes its own timeout with every request.
+            timeout=httpx.Timeout(600.0, connect=10.0),
+            verify=os.getenv("REQUESTS_CA_BUNDLE") or True,
+            event_hooks={"request": [on_request]},
+        )
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-endpoint requests, new connections, TLS handshakes and reuse rate"""
+        report = {}
+        with self._lock:
+            for endpoint, stats in self._stats.items():
+                reused = max(0, stats["requests"] - stats["new_connections"])
+                report[endpoint] = {
+                    **stats,
+                    "reused_connections": reused,
+                    "reuse_rate": (100.0 * reused / stats["requests"]) if stats["requests"] else 0.0,
+                    "avg_connect_time": (
+                        stats["connect_time"] / stats["new_connections"] if stats["new_connections"] else 0.0
+                    ),
+                }
+        return report
+
+    def close(self) -> None:
+        with self._lock:
+            clients = [c for (pid, _), c in self._clients.items() if pid == os.getpid()]
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+http_client_pool = HttpClientPool()
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+default_max_bytes = 1024 * 1024 * 1024
+
+class SqliteResponseCache:
+    """
+    Persistent LLM response cache backed by a single SQLite file.
+
+    Implements autogen's cache protocol (get/set/close and the context manager used
+    around each completion call), so it can be passed as llm_config["cache"]. autogen
+    builds the key from the full request: model, sampling parameters, tools and the
+    complete message list including the system message. Keys are stored as sha256 digests
+    and responses as pickled completion objects.
+
+    Entries older than ttl seconds (None = never) count as misses. Once the stored
+    responses exceed max_bytes the least recently used ones are evicted. With
+    read_only, hits are served but nothing is written, so a rerun replays a previous
+    run without changing the cache. The stored size is tracked as a running total kept
+    by this connection, so a write does not rescan the table.
+
+    autogen deep-copies llm_config when it builds an agent; a deepcopy of the cache is
+    the cache itself, so every agent shares one connection.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        max_bytes: int = default_max_bytes,
+        read_only: bool = False,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_created ON responses (created)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @staticmethod
+    def _digest(key: Any) -> str:
+        return hashlib.sha256(str(key).encode("utf-8")).hexdigest()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached response for key, or default on a miss or expired entry"""
+        digest = self._digest(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (digest,)
+            ).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return default
+            if not self.read_only:
+                self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, digest))
+            self.hits += 1
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            return default
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store a response; a no-op in read-only mode"""
+        if self.read_only:
+            return
+        blob = pickle.dumps(value)
+        now = time.time()
+        digest = self._digest(key)
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (digest,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (digest, blob, len(blob), now, now),
+            )
+            self._total_bytes += len(blob) - (row[0] if row else 0)
+            self.writes += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            cutoff = time.time() - self.ttl
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE created < ?", (cutoff,)
+            ).fetchone()
+            if count:
+                self._conn.execute("DELETE FROM responses WHERE created < ?", (cutoff,))
+                self._total_bytes -= size
+                self.evictions += count
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for digest, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (digest,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process and current on-disk usage"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (100.0 * self.hits / lookups) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "read_only": self.read_only,
+        }
+
+    def clear(self) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # autogen wraps every completion call in `with cache:`; the connection stays open.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+_default_cache: Optional[SqliteResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[SqliteResponseCache]:
+    """
+    Return the process-wide response cache configured by LLM_CACHE_PATH (unset = no cache),
+    LLM_CACHE_TTL (seconds), LLM_CACHE_MAX_MB and LLM_CACHE_READ_ONLY.
+    """
+    global _default_cache
+    path = os.getenv("LLM_CACHE_PATH")
+    if not path:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.getenv("LLM_CACHE_TTL")
+            _default_cache = SqliteResponseCache(
+                path,
+                ttl=float(ttl) if ttl else None,
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", str(default_max_bytes // (1024 * 1024)))) * 1024 * 1024,
+                read_only=os.getenv("LLM_CACHE_READ_ONLY", "0") == "1",
+            )
+        return _default_cache
@@ -1,8 +1,23 @@
-from typing import Dict, List, Tuple
+import itertools
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from .agent_workflow import WorkflowController
 from .agent_helpers import extract_relevant_outputs
-from .shared_workspace import SharedWorkspace
+from .chat_history_sink import ChatHistorySink, history_sink_factory
+from .context_compaction import ContextCompactor
+from .prompt_assembly import PromptAssembler
+from .shared_workspace import SharedWorkspace, WorkspaceBackend, workspace_backend_factory
+
+# Programs kept in flight by run_workflow_batch
+default_max_in_flight = int(os.getenv("WORKFLOW_MAX_IN_FLIGHT", "4"))
+# Workers per phase stage in run_workflow_pipeline, unless stage_workers overrides a phase
+default_stage_workers = int(os.getenv("WORKFLOW_STAGE_WORKERS", "2"))
 
 def create_custom_workflow(
     agents: Dict,
@@ -12,9 +27,32 @@ def create_custom_workflow(
     agent_patterns: Dict[str, str],
     agent_access_patterns: Dict[str, List[str]],
     phase_configs: Dict[str, Dict],
-    retry_config: Dict = None
+    retry_config: Dict = None,
+    parallel_phases: bool = True,
+    history_sink: Union[str, Callable[[str], ChatHistorySink], None] = None,
+    workspace_backend: Union[str, Callable[[str], WorkspaceBackend], None] = None,
+    proxy_builder: Optional[Callable[[Dict], object]] = None
     ):
-    """Create a custom multi-agent workflow with pure execution logic"""
+    """
+    Create a custom multi-agent workflow with pure execution logic.
+    With parallel_phases, run_fn runs phases that do not depend on each other
+    (per context_keys/output_key) concurrently. Every phase chats through the
+    User_Proxy, and an autogen agent is not safe in concurrent chats, so phases only
+    overlap when proxy_builder is given: it takes the run's agents and returns a fresh
+    User_Proxy executing the same tools, used by each additional phase of a wave.
+    Prompts are built by a PromptAssembler (run_fn.workflow["prompt_assembler"]); phase
+    configs may set "token_budget", "section_order" and "truncate_order".
+    A phase config may set "pre_check": a callable taking the phase context and
+    returning the phase output when a local check is conclusive, or None to ask the LLM.
+    On retries, prompt fields listed in a phase's "compaction" are shrunk by a
+    ContextCompactor (run_fn.workflow["context_compactor"]).
+    history_sink decides which chat messages a run keeps: "keep" (default), "discard",
+    "last:<n>" per agent, "spill:<directory>" for compressed files, or a callable
+    returning a ChatHistorySink for a program key.
+    workspace_backend stores each program's SharedWorkspace: "memory" (default),
+    "sqlite:<path>" so worker processes can attach to a program's state by its key,
+    or a callable returning a WorkspaceBackend for a program key.
+    """
     
     # Default retry config if none provided
     default_retry_config = {
@@ -30,45 +68,401 @@ def create_custom_workflow(
         phase_order=phase_order
     )
 
-    def run_fn(cpp_code: str, key: str = "default") -> Tuple[List[dict], Dict[str, str]]:
-        """Core workflow execution logic"""
-        
-        # Initialize shared workspace
-        workspace = SharedWorkspace("translation_workflow", agent_access_patterns)
-        workspace.write("original_cpp_code", cpp_code, "System")
-        workspace.write("program_key", key, "System")
-        chat_history: List[dict] = []
-        max_retries = retry_config.get("max_retries", 1)
-        attempt = 1
-
-        while attempt <= max_retries:
-            # Execute all configured phases
-            for phase_name in execution_phases:
-                _execute_generic_phase(
-                    phase_name=phase_name,
-                    phase_config=phase_configs[phase_name],
-                    agents=agents,
-                    controller=controller,
-                    workspace=workspace,
-                    agent_patterns=agent_patterns,
-                    chat_history=chat_history
-                )
-            
-            # Check retry conditions only if retry is enabled
-            if retry_config.get("enabled", False):
-                should_retry, attempt = _check_retry_conditions(
-                    workspace, attempt, max_retries, retry_config
-                )
-                if not should_retry:
-                    break
+    workflow = {
+        "controller": controller,
+        "execution_phases": execution_phases,
+        "phase_configs": phase_configs,
+        "agent_patterns": agent_patterns,
+        "agent_access_patterns": agent_access_patterns,
+        "retry_config": retry_config,
+        "graph": _build_phase_graph(execution_phases, phase_configs),
+        "prompt_assembler": PromptAssembler(),
+        "context_compactor": ContextCompactor(),
+        "history_sink": history_sink_factory(history_sink),
+        "workspace_backend": workspace_backend_factory(workspace_backend),
+        "proxy_builder": proxy_builder,
+    }
+
+    def run_fn(cpp_code: str, key: str = "default", agents: Dict = agents) -> Tuple[List[dict], Dict[str, str]]:
+        """
+        Core workflow execution logic.
+        agents overrides the workflow's agents for this run; concurrent runs must each
+        pass their own agent instances since autogen agents keep per-chat state.
+        """
+        state = _start_program(workflow, cpp_code, key)
+
+        while True:
+            # Execute the configured phases; retries skip phases whose inputs are unchanged
+            if parallel_phases:
+                _run_attempt_dag(workflow, state, agents)
             else:
-                # No retry logic - exit after first execution
+                phase_name = _next_phase(workflow, state)
+                while phase_name is not None:
+                    _run_phase(workflow, state, phase_name, agents)
+                    phase_name = _next_phase(workflow, state, phase_name)
+
+            if not _finish_attempt(workflow, state):
                 break
 
-        return chat_history, workspace.get_all_outputs()
+        return state["chat_history"].messages(), state["workspace"].get_all_outputs()
 
+    # Exposes the configuration to run_workflow_pipeline
+    run_fn.workflow = workflow
     return agents, run_fn
 
+def _start_program(workflow: Dict, cpp_code: str, key: str) -> Dict:
+    """Create the per-program run state with a fresh shared workspace"""
+    workspace = SharedWorkspace(
+        "translation_workflow", workflow["agent_access_patterns"], backend=workflow["workspace_backend"](key)
+    )
+    workspace.write("original_cpp_code", cpp_code, "System")
+    workspace.write("program_key", key, "System")
+    return {
+        "key": key,
+        "workspace": workspace,
+        "chat_history": workflow["history_sink"](key),
+        "attempt": 1,
+        "start_time": time.perf_counter(),
+        # Phase -> context values it last ran with, and phases forced to re-run
+        "phase_inputs": {},
+        "failed_phases": set(),
+        "phases_skipped": 0,
+        # Phase -> prompt kwargs of its last run, the baseline for retry compaction
+        "sent_kwargs": {},
+    }
+
+def _build_phase_graph(execution_phases: List[str], phase_configs: Dict[str, Dict]) -> Dict:
+    """
+    Derive phase dependencies from context_keys and output_key.
+    A phase depends on the earlier phases producing its context keys; keys produced
+    later (e.g. critic_review feeding TRANSLATION) are feedback from the previous attempt.
+    wait_for adds the ordering edges needed to run phases concurrently with the same
+    result as running them in order: a phase also waits for earlier phases that read
+    or write its output_key.
+    Returns {"producers": {output_key: phase}, "upstream": {phase: [phases]},
+    "wait_for": {phase: set of phases}}.
+    """
+    producers: Dict[str, str] = {}
+    upstream: Dict[str, List[str]] = {}
+    wait_for: Dict[str, set] = {}
+    for index, phase_name in enumerate(execution_phases):
+        config = phase_configs[phase_name]
+        upstream[phase_name] = [
+            producers[key] for key in config.get("context_keys", []) if key in producers
+        ]
+        wait_for[phase_name] = set(upstream[phase_name]) | {
+            earlier for earlier in execution_phases[:index]
+            if config["output_key"] in phase_configs[earlier].get("context_keys", [])
+            or config["output_key"] == phase_configs[earlier]["output_key"]
+        }
+        producers[config["output_key"]] = phase_name
+    return {"producers": producers, "upstream": upstream, "wait_for": wait_for}
+
+def _phase_inputs(workflow: Dict, state: Dict, phase_name: str) -> Dict:
+    workspace = state["workspace"]
+    return {key: workspace.read(key) for key in workflow["phase_configs"][phase_name].get("context_keys", [])}
+
+def _next_phase(workflow: Dict, state: Dict, after: Optional[str] = None) -> Optional[str]:
+    """
+    Next phase of the current attempt that must run, or None when the attempt is done.
+    The first attempt runs every phase. Retries run a phase only when a retry condition
+    marked it failed or its context values differ from its last run; phases are
+    checked in order, so changed upstream outputs are already in the workspace.
+    """
+    phases = workflow["execution_phases"]
+    for phase_name in phases[phases.index(after) + 1 if after else 0:]:
+        if _phase_needs_run(workflow, state, phase_name):
+            return phase_name
+        state["phases_skipped"] += 1
+    return None
+
+def _phase_needs_run(workflow: Dict, state: Dict, phase_name: str) -> bool:
+    last_inputs = state["phase_inputs"].get(phase_name)
+    return (
+        last_inputs is None
+        or phase_name in state["failed_phases"]
+        or _phase_inputs(workflow, state, phase_name) != last_inputs
+    )
+
+def _run_attempt_dag(workflow: Dict, state: Dict, agents: Dict):
+    """
+    Run one attempt with independent phases in parallel.
+    Phases whose wait_for phases are done run together in a wave, at most one phase per
+    agent since an agent holds one conversation at a time; every phase after the first
+    chats through its own User_Proxy from the workflow's proxy_builder, and without one
+    phases run one at a time. Chats run concurrently but workspace writes and chat
+    history are applied in execution_phases order after the wave, so outputs are
+    identical to a sequential attempt.
+    """
+    phases = workflow["execution_phases"]
+    wait_for = workflow["graph"]["wait_for"]
+    phase_configs = workflow["phase_configs"]
+    done = set()
+    while len(done) < len(phases):
+        wave, wave_agents = [], set()
+        for phase_name in phases:
+            if phase_name in done or not wait_for[phase_name] <= done:
+                continue
+            if not _phase_needs_run(workflow, state, phase_name):
+                state["phases_skipped"] += 1
+                done.add(phase_name)
+                continue
+            agent_name = _phase_agent_name(phase_name, phase_configs[phase_name], workflow["controller"])
+            if agent_name not in wave_agents:
+                wave_agents.add(agent_name)
+                wave.append(phase_name)
+        if not wave:
+            # Skipped phases may have unblocked others; look again.
+            continue
+
+        proxy_builder = workflow["proxy_builder"]
+        if len(wave) == 1 or proxy_builder is None:
+            # The User_Proxy would be shared; run the first ready phase alone.
+            _run_phase(workflow, state, wave[0], agents)
+            done.add(wave[0])
+            continue
+
+        wave_agent_sets = [agents] + [
+            dict(agents, User_Proxy=proxy_builder(agents)) for _ in wave[1:]
+        ]
+        for phase_name in wave:
+            state["phase_inputs"][phase_name] = _phase_inputs(workflow, state, phase_name)
+            state["failed_phases"].discard(phase_name)
+        with ThreadPoolExecutor(max_workers=len(wave), thread_name_prefix="phase") as executor:
+            futures = [
+                executor.submit(
+                    _generate_phase_output, phase_name, phase_configs[phase_name], phase_agents,
+                    workflow["controller"], state["workspace"], workflow["agent_patterns"],
+                    workflow["prompt_assembler"], workflow["context_compactor"], state["sent_kwargs"],
+                )
+                for phase_name, phase_agents in zip(wave, wave_agent_sets)
+            ]
+            generated = [future.result() for future in futures]
+        for phase_name, (agent_name, messages, output_text) in zip(wave, generated):
+            state["chat_history"].extend(messages)
+            state["workspace"].write(phase_configs[phase_name]["output_key"], output_text, agent_name)
+            done.add(phase_name)
+
+def _failed_phases(workflow: Dict, failed_conditions: List[Dict]) -> set:
+    """
+    Phases to re-run for the failed retry conditions. A condition may list them in
+    "rerun_phases"; otherwise the phase producing its workspace_key and the phases that
+    produced that phase's inputs (the artifact it judged) re-run. Conditions on keys no
+    phase produces re-run everything.
+    """
+    graph = workflow["graph"]
+    failed = set()
+    for condition in failed_conditions:
+        if condition.get("rerun_phases"):
+            failed.update(condition["rerun_phases"])
+            continue
+        producer = graph["producers"].get(condition.get("workspace_key"))
+        if producer is None:
+            return set(workflow["execution_phases"])
+        failed.add(producer)
+        failed.update(graph["upstream"][producer])
+    return failed
+
+def _run_phase(workflow: Dict, state: Dict, phase_name: str, agents: Dict):
+    state["phase_inputs"][phase_name] = _phase_inputs(workflow, state, phase_name)
+    state["failed_phases"].discard(phase_name)
+    _execute_generic_phase(
+        phase_name=phase_name,
+        phase_config=workflow["phase_configs"][phase_name],
+        agents=agents,
+        controller=workflow["controller"],
+        workspace=state["workspace"],
+        agent_patterns=workflow["agent_patterns"],
+        chat_history=state["chat_history"],
+        prompt_assembler=workflow["prompt_assembler"],
+        context_compactor=workflow["context_compactor"],
+        sent_kwargs=state["sent_kwargs"]
+    )
+
+def _finish_attempt(workflow: Dict, state: Dict) -> bool:
+    """Evaluate retry conditions after a full pass; True when the program must run again"""
+    retry_config = workflow["retry_config"]
+    # Check retry conditions only if retry is enabled
+    if not retry_config.get("enabled", False):
+        return False
+    failed_conditions: List[Dict] = []
+    should_retry, state["attempt"] = _check_retry_conditions(
+        state["workspace"], state["attempt"], retry_config.get("max_retries", 1), retry_config,
+        failed_conditions
+    )
+    if should_retry:
+        state["failed_phases"] = _failed_phases(workflow, failed_conditions)
+    return should_retry
+
+def _program_result(state: Dict, error: Optional[str] = None) -> Dict:
+    if error is not None:
+        return {"chat_history": [], "outputs": {}, "error": error,
+                "duration": time.perf_counter() - state["start_time"]}
+    return {
+        "chat_history": state["chat_history"].messages(),
+        "outputs": state["workspace"].get_all_outputs(),
+        "error": None,
+        "duration": time.perf_counter() - state["start_time"],
+        "phases_skipped": state["phases_skipped"],
+    }
+
+def run_workflow_batch(
+    run_fn: Callable,
+    items: Iterable[Tuple[str, str]],
+    agent_builder: Callable[[], Dict],
+    max_in_flight: Optional[int] = None,
+    on_result: Optional[Callable[[str, Dict], None]] = None,
+) -> Dict[str, Dict]:
+    """
+    Run the workflow for many (key, cpp_code) items with up to max_in_flight programs
+    in flight (default default_max_in_flight). Most of a run is spent waiting on the LLM,
+    so overlapping programs raises throughput roughly by max_in_flight.
+
+    Every run gets its own SharedWorkspace (created by run_fn) and every worker thread
+    builds its own agents with agent_builder, so programs never share chat state.
+    on_result(key, result) is called from the calling thread as each program finishes,
+    also for programs in flight when the run is interrupted.
+    Returns {key: {"chat_history", "outputs", "error", "duration"}}; error is None
+    or the formatted traceback of a failed run.
+    """
+    max_in_flight = max(1, max_in_flight or default_max_in_flight)
+    local = threading.local()
+
+    def _run_one(key: str, cpp_code: str) -> Dict:
+        start_time = time.perf_counter()
+        try:
+            if not hasattr(local, "agents"):
+                local.agents = agent_builder()
+            chat_history, outputs = run_fn(cpp_code, key, agents=local.agents)
+            error = None
+        except Exception:
+            chat_history, outputs, error = [], {}, traceback.format_exc()
+        return {
+            "chat_history": chat_history,
+            "outputs": outputs,
+            "error": error,
+            "duration": time.perf_counter() - start_time,
+        }
+
+    results: Dict[str, Dict] = {}
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="workflow") as executor:
+        futures = {executor.submit(_run_one, key, cpp_code): key for key, cpp_code in items}
+        try:
+            for future in as_completed(futures):
+                key = futures[future]
+                results[key] = future.result()
+                if on_result is not None:
+                    on_result(key, results[key])
+        except BaseException:
+            # Interrupted: drop queued programs and let the ones in flight finish; their
+            # results still go to on_result (e.g. a checkpoint journal) before re-raising.
+            for future in futures:
+                future.cancel()
+            for future, key in futures.items():
+                if future.cancelled() or key in results:
+                    continue
+                try:
+                    results[key] = future.result()
+                except BaseException:
+                    continue
+                if on_result is not None:
+                    on_result(key, results[key])
+            raise
+    return results
+
+def run_workflow_pipeline(
+    run_fn: Callable,
+    items: Iterable[Tuple[str, str]],
+    agent_builder: Callable[[], Dict],
+    stage_workers: Optional[Dict[str, int]] = None,
+    on_result: Optional[Callable[[str, Dict], None]] = None,
+) -> Dict[str, Dict]:
+    """
+    Run the workflow for many (key, cpp_code) items as a stage pipeline.
+
+    Every execution phase is a stage with its own queue and stage_workers[phase]
+    worker threads (default default_stage_workers), so program k+1 can be in
+    REQUIREMENTS while program k is in REVIEW and every model endpoint stays busy.
+    A program that needs a retry re-enters at the first stage it must re-run; retries
+    are dequeued ahead of programs on an earlier attempt so they finish promptly.
+    Each worker builds its own agents with agent_builder and each program keeps its own
+    SharedWorkspace. A program's duration starts when its first stage picks it up, so
+    it excludes the wait behind programs enqueued earlier. Results and on_result match
+    run_workflow_batch.
+    """
+    workflow = run_fn.workflow
+    phases = workflow["execution_phases"]
+    stage_workers = stage_workers or {}
+    # Entries are (-attempt, sequence, state): retries first, FIFO otherwise.
+    queues = {phase: queue.PriorityQueue() for phase in phases}
+    finished: "queue.Queue[Tuple[Dict, Optional[str]]]" = queue.Queue()
+    sequence = itertools.count()
+
+    def _enqueue(phase: str, state: Dict):
+        queues[phase].put((-state["attempt"], next(sequence), state))
+
+    def _stage_worker(phase: str):
+        agents = None
+        while True:
+            _, _, state = queues[phase].get()
+            if state is None:
+                return
+            if state["start_time"] is None:
+                # Time spent queued before the first stage does not count towards the duration.
+                state["start_time"] = time.perf_counter()
+            try:
+                if agents is None:
+                    agents = agent_builder()
+                _run_phase(workflow, state, phase, agents)
+                next_phase = _next_phase(workflow, state, phase)
+                while next_phase is None and _finish_attempt(workflow, state):
+                    next_phase = _next_phase(workflow, state)
+                if next_phase is not None:
+                    _enqueue(next_phase, state)
+                else:
+                    finished.put((state, None))
+            except Exception:
+                finished.put((state, traceback.format_exc()))
+
+    threads = [
+        threading.Thread(target=_stage_worker, args=(phase,), name=f"workflow-{phase}", daemon=True)
+        for phase in phases
+        for _ in range(max(1, stage_workers.get(phase, default_stage_workers)))
+    ]
+    for thread in threads:
+        thread.start()
+
+    results: Dict[str, Dict] = {}
+    try:
+        pending = 0
+        for key, cpp_code in items:
+            state = _start_program(workflow, cpp_code, key)
+            state["start_time"] = None
+            _enqueue(phases[0], state)
+            pending += 1
+        while pending:
+            state, error = finished.get()
+            pending -= 1
+            results[state["key"]] = _program_result(state, error)
+            if on_result is not None:
+                on_result(state["key"], results[state["key"]])
+    finally:
+        # Sentinels sort ahead of any leftover work, so workers stop after their current phase.
+        for phase in phases:
+            for _ in range(max(1, stage_workers.get(phase, default_stage_workers))):
+                queues[phase].put((float("-inf"), next(sequence), None))
+        for thread in threads:
+            thread.join()
+        # Programs that finished while an interrupted run was stopping are still reported.
+        while not finished.empty():
+            state, error = finished.get()
+            if state["key"] in results:
+                continue
+            results[state["key"]] = _program_result(state, error)
+            if on_result is not None:
+                on_result(state["key"], results[state["key"]])
+    return results
+
 def _execute_generic_phase(
     phase_name: str,
     phase_config: Dict,
@@ -76,20 +470,62 @@ def _execute_generic_phase(
     controller: WorkflowController,
     workspace: SharedWorkspace,
     agent_patterns: Dict[str, str],
-    chat_history: List[dict]
+    chat_history: Union[List[dict], ChatHistorySink],
+    prompt_assembler: Optional[PromptAssembler] = None,
+    context_compactor: Optional[ContextCompactor] = None,
+    sent_kwargs: Optional[Dict[str, Dict]] = None
 ):
     """Generic phase execution method"""
+    agent_name, messages, output_text = _generate_phase_output(
+        phase_name, phase_config, agents, controller, workspace, agent_patterns,
+        prompt_assembler, context_compactor, sent_kwargs
+    )
+    chat_history.extend(messages)
     
-    # Get the agent for this phase
+    # Write to workspace
+    workspace.write(phase_config["output_key"], output_text, agent_name)
+
+def _phase_agent_name(phase_name: str, phase_config: Dict, controller: WorkflowController) -> str:
     speakers = controller.get_speakers_for_phase(phase_name) or [phase_config["default_agent"]]
-    agent_name = speakers[0]
+    return speakers[0]
+
+def _generate_phase_output(
+    phase_name: str,
+    phase_config: Dict,
+    agents: Dict,
+    controller: WorkflowController,
+    workspace: SharedWorkspace,
+    agent_patterns: Dict[str, str],
+    prompt_assembler: Optional[PromptAssembler] = None,
+    context_compactor: Optional[ContextCompactor] = None,
+    sent_kwargs: Optional[Dict[str, Dict]] = None,
+) -> Tuple[str, List[dict], str]:
+    """Run a phase's chat without touching the workspace; returns (agent_name, chat messages, output)"""
+    
+    # Get the agent for this phase
+    agent_name = _phase_agent_name(phase_name, phase_config, controller)
     
     # Get context for this agent
     context = workspace.get_context_for_agent(agent_name, phase_config["context_keys"])
+
+    # A local pre-check with a conclusive result replaces the LLM round-trip
+    pre_check = phase_config.get("pre_check")
+    if pre_check is not None:
+        output_text = pre_check(context)
+        if output_text is not None:
+            return agent_name, [{"name": agent_name, "role": "assistant", "content": output_text}], output_text
     
     # Build the prompt message
     prompt_kwargs = phase_config["prompt_kwargs"](context)
-    message = phase_config["prompt_template"].format(**prompt_kwargs)
+    if context_compactor is not None and sent_kwargs is not None:
+        # sent_kwargs keeps the uncompacted values so retries compare like with like
+        previous_kwargs = sent_kwargs.get(phase_name)
+        sent_kwargs[phase_name] = prompt_kwargs
+        prompt_kwargs = context_compactor.compact(phase_name, phase_config, prompt_kwargs, previous_kwargs)
+    if prompt_assembler is not None:
+        message = prompt_assembler.assemble(phase_name, phase_config, prompt_kwargs, agent_name)
+    else:
+        message = phase_config["prompt_template"].format(**prompt_kwargs)
     
     # Execute the chat
     chat_result = agents["User_Proxy"].initiate_chat(
@@ -97,29 +533,31 @@ def _execute_generic_phase(
         message=message,
         max_turns=phase_config["max_turns"],
     )
-    chat_history.extend(getattr(chat_result, "chat_history", []))
+    messages = getattr(chat_result, "chat_history", [])
     
     # Extract and store the output
     if phase_config.get("extract_from_chat", False):
         # Special handling - extract from chat directly
         output_text = next(
-            (m.get("content", "") for m in reversed(getattr(chat_result, "chat_history", [])) 
+            (m.get("content", "") for m in reversed(messages) 
              if m.get("name") == agent_name),
             "",
         )
     else:
         # Standard extraction using patterns
         outputs = extract_relevant_outputs(
-            getattr(chat_result, "chat_history", []),
+            messages,
             {agent_name: agent_patterns[agent_name]}
         )
         output_text = (outputs.get(agent_name, []) or [""])[0]
-    
-    # Write to workspace
-    workspace.write(phase_config["output_key"], output_text, agent_name)
 
-def _check_retry_conditions(workspace, attempt, max_retries, retry_config):
-    """Check if workflow should retry based on configured conditions"""
+    return agent_name, messages, output_text
+
+def _check_retry_conditions(workspace, attempt, max_retries, retry_config, failed_conditions=None):
+    """
+    Check if workflow should retry based on configured conditions.
+    Conditions that fired are appended to failed_conditions when given.
+    """
     
     should_retry = False
     feedback_messages = []
@@ -138,6 +576,8 @@ def _check_retry_conditions(workspace, attempt, max_retries, retry_config):
                 should_retry = True
                 message = condition.get("retry_message", f"{condition_type} condition met")
                 feedback_messages.append(message)
+                if failed_conditions is not None:
+                    failed_conditions.append(condition)
     
     # Handle retry logic
     if should_retry:
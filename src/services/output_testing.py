@@ -1,14 +1,27 @@
-import subprocess
+import ast
+import json
 import os
 import sys
 import tempfile
 import time
-import uuid
 import shutil
 import re
-from typing import List, Dict
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional
+
+from .command_executor import default_max_output_bytes, execute_command_async, execution_slots, run_sync
+from .compilation_cache import CompilationCache
+from .execution_tracing import get_tracer
+from .python_worker_pool import PythonWorkerPool, get_python_worker_pool
+from .sandbox_pool import get_sandbox_pool
 
 default_timeout = 10
+CPP_COMPILE_FLAGS: List[str] = []
+# Upper bound on concurrently running test processes in run_and_compare_tests
+default_max_workers = int(os.getenv("TEST_MAX_WORKERS", str(min(32, os.cpu_count() or 1))))
+# Run Python tests in warm fork servers instead of one fresh interpreter per test
+use_python_worker_pool = os.getenv("PYTHON_WORKER_POOL", "1") != "0"
 TEST_NAME_CPP = re.compile(r"\b(?:void\s+)?(test_[A-Za-z0-9_]+)\s*\(")
 TEST_NAME_PY  = re.compile(r"\bdef\s+(test_[A-Za-z0-9_]+)\s*\(")
 
@@ -27,80 +40,63 @@ def find_gpp():
         if shutil.which(path) is not None:
             return path
     
-    print(" g++ not found. Please install MinGW or add g++ to PATH")
+    get_tracer().event("error", "cpp.compiler_missing", message="g++ not found. Please install MinGW or add g++ to PATH")
     return None
 
 # Get the g++ path
 GPP_PATH = find_gpp()
 
-def _execute_command(command, input_data=""):
+def _create_compile_cache() -> Optional[CompilationCache]:
+    """Create the persistent compilation cache unless disabled with CPP_COMPILE_CACHE=0"""
+    if os.getenv("CPP_COMPILE_CACHE", "1") == "0":
+        return None
+    cache_dir = os.getenv("CPP_COMPILE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "cpp_compile_cache")
+    max_bytes = int(os.getenv("CPP_COMPILE_CACHE_MAX_MB", "512")) * 1024 * 1024
+    try:
+        return CompilationCache(cache_dir, max_bytes=max_bytes)
+    except OSError as e:
+        get_tracer().event("warning", "cpp.cache_disabled", cache_dir=cache_dir, error=str(e))
+        return None
+
+compile_cache = _create_compile_cache()
+
+def set_compile_cache(cache: Optional[CompilationCache]):
+    """Replace the compilation cache used by run_cpp_code (None disables caching)"""
+    global compile_cache
+    compile_cache = cache
+
+def _execute_command(command, input_data="", timeout=None):
     """
     Executes a shell command and captures its output.
-    This is a helper function used by both run_cpp_code and run_python_code.
+    Blocking wrapper around command_executor.execute_command_async.
+    Returns (stdout, stderr, returncode, success).
     """
-    stdout = ""
-    stderr = ""
-    returncode = None
-    success = False
-    
-    # Add execution ID for tracking
-    execution_id = str(uuid.uuid4())[:8]
-    print(f"\n [EXECUTION {execution_id}] Starting command execution...")
-    print(f" Command: {' '.join(command)}")
-    print(f" Input: {repr(input_data)}")
-    
-    start_time = time.time()
-    
-    try:
-        process = subprocess.Popen(
-            command,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding='utf-8'
-        )
-        stdout, stderr = process.communicate(input=input_data, timeout=default_timeout)
-        returncode = process.returncode
-        success = (returncode == 0)
-        
-        execution_time = time.time() - start_time
-        print(f" Execution time: {execution_time:.2f} seconds")
-        print(f" Output: {repr(stdout)}")
-        print(f" Errors: {repr(stderr)}")
-        print(f" Return code: {returncode}")
-        print(f" Success: {success}")
-
-    except subprocess.TimeoutExpired:
-        process.kill()
-        stdout, stderr = process.communicate()
-        stderr = f"TimeoutExpired: Command took too long to execute ({default_timeout} seconds).\n" + stderr
-        returncode = -1
-        print(f" TIMEOUT: Command exceeded {default_timeout} seconds")
-    except FileNotFoundError:
-        stderr = f"Error: Command not found or executable missing: {' '.join(command)}\n"
-        returncode = 127
-        print(f" FILE NOT FOUND: {' '.join(command)}")
-    except Exception as e:
-        stderr = f"An unexpected error occurred: {e}\n" + stderr
-        returncode = -2
-        print(f" UNEXPECTED ERROR: {e}")
+    return run_sync(_execute_command_async(command, input_data=input_data, timeout=timeout))[:4]
 
-    print(f"[EXECUTION {execution_id}] Completed\n")
-    return stdout.strip(), stderr.strip(), returncode, success
+async def _execute_command_async(command, input_data="", timeout=None, env=None):
+    """Returns (stdout, stderr, returncode, success, truncated); output is capped per stream."""
+    return await execute_command_async(
+        command, input_data=input_data, timeout=default_timeout if timeout is None else timeout, env=env
+    )
 
-def run_cpp_code(code_string: str, input_data: str = "") -> dict:
+def run_cpp_code(code_string: str, input_data: str = "", timeout: Optional[float] = None) -> dict:
     """
     Compiles and runs C++ code.
     The Code_Tester agent will call this function.
     """
-    print(f"\n [C++ EXECUTION] Starting C++ code execution...")
-    print(f" Code length: {len(code_string)} characters")
-    print(f" Input data: {repr(input_data)}")
+    return run_sync(run_cpp_code_async(code_string, input_data=input_data, timeout=timeout))
+
+async def run_cpp_code_async(code_string: str, input_data: str = "", timeout: Optional[float] = None) -> dict:
+    """
+    Compiles and runs C++ code without blocking the event loop.
+    timeout (default default_timeout) applies to the compile and to the run.
+    """
+    tracer = get_tracer()
+    tracer.event("debug", "cpp.run_code", code_bytes=len(code_string), payload={"input": input_data})
     
     if GPP_PATH is None:
         error_msg = "g++ compiler not found. Please install MinGW or add g++ to PATH"
-        print(f" {error_msg}")
+        tracer.event("error", "cpp.compiler_missing", message=error_msg)
         return {
             "stdout": "",
             "stderr": error_msg,
@@ -109,89 +105,315 @@ def run_cpp_code(code_string: str, input_data: str = "") -> dict:
             "log": error_msg
         }
     
-    with tempfile.TemporaryDirectory() as tmpdir:
-        cpp_file = os.path.join(tmpdir, "program.cpp")
-        executable_file = os.path.join(tmpdir, "program")
-        if os.name == "nt":
-            executable_file += ".exe"
-
+    with get_sandbox_pool().sandbox() as tmpdir:
         log = []
-        full_success = True
+        executable_file, error_result = await _compile_cpp_async(code_string, tmpdir, log, timeout=timeout)
+        if error_result is not None:
+            return error_result
+
+        result = await _run_cpp_executable_async([executable_file], input_data, log, timeout=timeout)
+        tracer.event("debug", "cpp.result", success=result["success"], payload={"result": result})
+        return result
+
+async def _compile_cpp_async(
+    code_string: str,
+    tmpdir: str,
+    log: List[str],
+    extra_flags: Optional[List[str]] = None,
+    timeout: Optional[float] = None,
+    cache_flags: Optional[List[str]] = None,
+):
+    """
+    Writes the C++ code into tmpdir and compiles it (extra_flags go before the source file).
+    cache_flags replace extra_flags in the cache key when those name per-sandbox paths.
+    Returns (executable_file, None) on success or (None, error_result) on failure,
+    where error_result has the same shape as the run_cpp_code result.
+    """
+    cpp_file = os.path.join(tmpdir, "program.cpp")
+    executable_file = os.path.join(tmpdir, "program")
+    if os.name == "nt":
+        executable_file += ".exe"
+
+    tracer = get_tracer()
+    flags = CPP_COMPILE_FLAGS + (extra_flags or [])
+    cache = compile_cache
+    cache_key = None
+    if cache is not None:
+        key_flags = flags if cache_flags is None else CPP_COMPILE_FLAGS + cache_flags
+        cache_key = CompilationCache.make_key(code_string, GPP_PATH, key_flags)
+        # The hit is linked into tmpdir, so a concurrent eviction cannot remove it before it runs.
+        if cache.fetch(cache_key, [os.path.basename(executable_file)], tmpdir):
+            log.append(f"Compilation cache hit: {cache_key[:12]}")
+            tracer.event("info", "cpp.compile", cache_hit=True, key=cache_key[:12], source_bytes=len(code_string))
+            return executable_file, None
+
+    try:
+        with open(cpp_file, "w", encoding='utf-8') as f:
+            f.write(code_string)
+        log.append(f"C++ code written to {cpp_file}")
+    except Exception as e:
+        tracer.event("error", "cpp.write_failed", error=str(e))
+        return None, {
+            "stdout": "",
+            "stderr": f"Failed to write C++ file: {e}",
+            "returncode": -1,
+            "success": False,
+            "log": "\n".join(log)
+        }
+
+    compile_command = [GPP_PATH, *flags, cpp_file, "-o", executable_file]
+    log.append(f"Compiling with command: {' '.join(compile_command)}")
+    start_time = time.perf_counter()
+    compile_stdout, compile_stderr, compile_returncode, compile_success, _ = \
+        await _execute_command_async(compile_command, timeout=timeout)
+    tracer.event(
+        "info", "cpp.compile", cache_hit=False, success=compile_success, source_bytes=len(code_string),
+        duration=round(time.perf_counter() - start_time, 6),
+    )
+
+    if not compile_success:
+        log.append(f"Compilation Failed (Return Code: {compile_returncode}):")
+        if compile_stdout: log.append(f"Compile STDOUT:\n{compile_stdout}")
+        if compile_stderr: log.append(f"Compile STDERR:\n{compile_stderr}")
+        return None, {
+            "stdout": "",
+            "stderr": f"Compilation failed.\n{compile_stderr}",
+            "returncode": compile_returncode,
+            "success": False,
+            "log": "\n".join(log)
+        }
+    log.append("Compilation Successful.")
 
+    if cache is not None:
         try:
-            with open(cpp_file, "w", encoding='utf-8') as f:
-                f.write(code_string)
-            log.append(f"C++ code written to {cpp_file}")
-            print(f" C++ code saved to: {cpp_file}")
+            cache.put(cache_key, executable_file)
+            log.append(f"Executable stored in compilation cache: {cache_key[:12]}")
         except Exception as e:
-            print(f" Failed to write C++ file: {e}")
-            return {
-                "stdout": "",
-                "stderr": f"Failed to write C++ file: {e}",
-                "returncode": -1,
-                "success": False,
-                "log": "\n".join(log)
-            }
-
-        compile_command = [GPP_PATH, cpp_file, "-o", executable_file]
-        log.append(f"Compiling with command: {' '.join(compile_command)}")
-        print(f" Compiling C++ code with {GPP_PATH}...")
-        compile_stdout, compile_stderr, compile_returncode, compile_success = \
-            _execute_command(compile_command)
+            tracer.event("warning", "cpp.cache_store_failed", error=str(e))
+    return executable_file, None
 
+async def _precompile_cpp_header_async(header_code: str, log: List[str], dest_dir: str) -> Optional[str]:
+    """
+    Compiles header_code once into a precompiled header stored in the compilation cache.
+    The header and its .gch are linked into dest_dir; returns the header path there (the
+    .gch sits next to it, so `-include <path>` picks it up), or None when no cache is
+    configured or the code does not compile as a header.
+    """
+    cache = compile_cache
+    if cache is None or GPP_PATH is None:
+        return None
+    tracer = get_tracer()
+
+    header_flags = CPP_COMPILE_FLAGS + ["-x", "c++-header"]
+    cache_key = CompilationCache.make_key(header_code, GPP_PATH, header_flags)
+    header_name = "legacy.hpp"
+    header_names = [header_name, header_name + ".gch"]
+    if cache.fetch(cache_key, header_names, dest_dir):
+        log.append(f"Precompiled header cache hit: {cache_key[:12]}")
+        tracer.event("info", "cpp.precompile_header", cache_hit=True, key=cache_key[:12])
+        return os.path.join(dest_dir, header_name)
+
+    with get_sandbox_pool().sandbox() as tmpdir:
+        header_file = os.path.join(tmpdir, header_name)
+        with open(header_file, "w", encoding='utf-8') as f:
+            f.write(header_code)
+
+        compile_command = [GPP_PATH, *header_flags, header_file, "-o", header_file + ".gch"]
+        log.append(f"Precompiling header with command: {' '.join(compile_command)}")
+        start_time = time.perf_counter()
+        _, compile_stderr, compile_returncode, compile_success, _ = await _execute_command_async(compile_command)
+        tracer.event(
+            "info", "cpp.precompile_header", cache_hit=False, success=compile_success,
+            source_bytes=len(header_code), duration=round(time.perf_counter() - start_time, 6),
+        )
         if not compile_success:
-            full_success = False
-            log.append(f"Compilation Failed (Return Code: {compile_returncode}):")
-            if compile_stdout: log.append(f"Compile STDOUT:\n{compile_stdout}")
-            if compile_stderr: log.append(f"Compile STDERR:\n{compile_stderr}")
-            print(f" C++ compilation failed!")
-            return {
-                "stdout": "",
-                "stderr": f"Compilation failed.\n{compile_stderr}",
-                "returncode": compile_returncode,
-                "success": False,
-                "log": "\n".join(log)
-            }
-        log.append("Compilation Successful.")
-        print(f" C++ compilation successful!")
+            log.append(f"Header precompilation failed (Return Code: {compile_returncode}), using full compilation.")
+            return None
 
-        execute_command = [executable_file]
-        log.append(f"Executing with command: {' '.join(execute_command)}")
-        print(f"  Running C++ executable...")
-        run_stdout, run_stderr, run_returncode, run_success = \
-            _execute_command(execute_command, input_data=input_data)
+        try:
+            cache.put_files(cache_key, [header_file, header_file + ".gch"])
+        except Exception as e:
+            tracer.event("warning", "cpp.cache_store_failed", error=str(e))
+            return None
+    if not cache.fetch(cache_key, header_names, dest_dir):
+        return None
+    return os.path.join(dest_dir, header_name)
+
+async def _run_cpp_executable_async(
+    execute_command: List[str],
+    input_data: str,
+    log: List[str],
+    timeout: Optional[float] = None,
+) -> dict:
+    """
+    Runs an already compiled C++ executable and builds the run_cpp_code result dict.
+    """
+    log = list(log)
+    log.append(f"Executing with command: {' '.join(execute_command)}")
+    run_stdout, run_stderr, run_returncode, run_success, run_truncated = \
+        await _execute_command_async(execute_command, input_data=input_data, timeout=timeout)
+
+    if not run_success:
+        log.append(f"Execution Failed (Return Code: {run_returncode}):")
+        if run_stdout: log.append(f"Run STDOUT:\n{run_stdout}")
+        if run_stderr: log.append(f"Run STDERR:\n{run_stderr}")
+    else:
+        log.append("Execution Successful.")
+
+    return {
+        "stdout": run_stdout,
+        "stderr": run_stderr,
+        "returncode": run_returncode,
+        "success": run_success,
+        "truncated": run_truncated,
+        "log": "\n".join(log)
+    }
 
-        if not run_success:
-            full_success = False
-            log.append(f"Execution Failed (Return Code: {run_returncode}):")
-            if run_stdout: log.append(f"Run STDOUT:\n{run_stdout}")
-            if run_stderr: log.append(f"Run STDERR:\n{run_stderr}")
-            print(f" C++ execution failed!")
-        else:
-            log.append("Execution Successful.")
-            print(f" C++ execution successful!")
+def build_cpp_dispatch_driver(test_names: List[str]) -> str:
+    """
+    Builds a main(argc, argv) that runs the single test named by argv[1].
+    Uses a local string comparison so no extra headers are needed.
+    """
+    branches = "\n".join(
+        f'    if (_ct_str_eq(argv[1], "{name}")) {{ {name}(); return 0; }}'
+        for name in test_names
+    )
+    return f"""
+static bool _ct_str_eq(const char* a, const char* b) {{
+    while (*a && *a == *b) {{ ++a; ++b; }}
+    return *a == *b;
+}}
 
-        result = {
-            "stdout": run_stdout,
-            "stderr": run_stderr,
-            "returncode": run_returncode,
-            "success": full_success and run_success,
-            "log": "\n".join(log)
+int main(int argc, char** argv) {{
+    if (argc < 2) return 2;
+{branches}
+    return 3;
+}}
+"""
+
+def run_cpp_tests(
+    code_string: str,
+    test_names: List[str],
+    input_data: str = "",
+    header_code: str = "",
+    timeout: Optional[float] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, dict]:
+    """
+    Compiles the C++ code together with a dispatching driver once and runs every test by name.
+    header_code (e.g. the legacy program) is placed before code_string. It is compiled once
+    into a cached precompiled header, so only code_string and the driver are compiled per call;
+    if that split build fails, everything is compiled as one translation unit instead, and if
+    the dispatching build still fails, every test is compiled and run on its own.
+    Returns {test_name: result} where each result has the same shape as the run_cpp_code result.
+    """
+    return run_sync(run_cpp_tests_async(
+        code_string, test_names, input_data=input_data, header_code=header_code, timeout=timeout,
+        max_workers=max_workers,
+    ))
+
+async def run_cpp_tests_async(
+    code_string: str,
+    test_names: List[str],
+    input_data: str = "",
+    header_code: str = "",
+    timeout: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> Dict[str, dict]:
+    """
+    Async version of run_cpp_tests; the test runs execute concurrently after compilation,
+    at most max_workers (default TEST_MAX_WORKERS) at a time, or bounded by a semaphore
+    shared with the caller.
+    """
+    tracer = get_tracer()
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, max_workers or default_max_workers))
+
+    if GPP_PATH is None:
+        error_msg = "g++ compiler not found. Please install MinGW or add g++ to PATH"
+        tracer.event("error", "cpp.compiler_missing", message=error_msg)
+        error_result = {
+            "stdout": "",
+            "stderr": error_msg,
+            "returncode": -1,
+            "success": False,
+            "log": error_msg
         }
-        
-        print(f" C++ Result: {result}")
-        return result
+        return {name: dict(error_result) for name in test_names}
+
+    driver = build_cpp_dispatch_driver(test_names)
+    start_time = time.perf_counter()
+
+    with get_sandbox_pool().sandbox() as tmpdir:
+        log = []
+        executable_file, error_result = None, None
+        header_file = await _precompile_cpp_header_async(header_code, log, tmpdir) if header_code else None
+        if header_file is not None:
+            split_log = list(log)
+            executable_file, error_result = await _compile_cpp_async(
+                "\n".join([code_string, driver]), tmpdir, split_log,
+                extra_flags=["-include", header_file], timeout=timeout,
+                # The header lives in this sandbox; key the executable by its contents instead.
+                cache_flags=["-include", CompilationCache.make_key(header_code, GPP_PATH, [])],
+            )
+            if error_result is None:
+                log = split_log
+            else:
+                executable_file = None
+                log.append("Compilation against the precompiled header failed, retrying as a single unit.")
+
+        if executable_file is None:
+            full_code = "\n".join([header_code, code_string, driver]) if header_code else "\n".join([code_string, driver])
+            executable_file, error_result = await _compile_cpp_async(full_code, tmpdir, log, timeout=timeout)
+        if error_result is not None and len(test_names) > 1:
+            # One test the driver cannot call (e.g. it takes arguments) breaks the shared
+            # build; compile each test on its own so only the broken ones fail.
+            tracer.event("warning", "cpp.dispatch_failed", tests=len(test_names))
+            results = await asyncio.gather(*(
+                _bounded(semaphore, run_cpp_code_async(
+                    _build_cpp_test_program(header_code, code_string, name), input_data, timeout
+                ))
+                for name in test_names
+            ))
+            tracer.event(
+                "info", "cpp.tests", tests=len(test_names), compiled=False,
+                passed=sum(1 for r in results if r["success"]),
+                duration=round(time.perf_counter() - start_time, 6),
+            )
+            return dict(zip(test_names, results))
+        if error_result is not None:
+            tracer.event("info", "cpp.tests", tests=len(test_names), compiled=False,
+                         duration=round(time.perf_counter() - start_time, 6))
+            return {name: dict(error_result) for name in test_names}
+
+        results = await asyncio.gather(*(
+            _bounded(semaphore, _run_cpp_executable_async([executable_file, name], input_data, log, timeout=timeout))
+            for name in test_names
+        ))
+        tracer.event(
+            "info", "cpp.tests", tests=len(test_names), compiled=True,
+            passed=sum(1 for r in results if r["success"]),
+            duration=round(time.perf_counter() - start_time, 6),
+        )
+        return dict(zip(test_names, results))
 
-def run_python_code(code_string: str, input_data: str = "") -> dict:
+def run_python_code(code_string: str, input_data: str = "", timeout: Optional[float] = None) -> dict:
     """
     Runs Python code.
     The Code_tester agent will call this function.
     """
-    print(f"\n [PYTHON EXECUTION] Starting Python code execution...")
-    print(f" Code length: {len(code_string)} characters")
-    print(f" Input data: {repr(input_data)}")
+    return run_sync(run_python_code_async(code_string, input_data=input_data, timeout=timeout))
+
+async def run_python_code_async(code_string: str, input_data: str = "", timeout: Optional[float] = None) -> dict:
+    """
+    Runs Python code without blocking the event loop.
+    timeout defaults to default_timeout.
+    """
+    tracer = get_tracer()
+    tracer.event("debug", "python.run_code", code_bytes=len(code_string), payload={"input": input_data})
     
-    with tempfile.TemporaryDirectory() as tmpdir:
+    with get_sandbox_pool().sandbox() as tmpdir:
         py_file = os.path.join(tmpdir, "program.py")
 
         log = []
@@ -201,9 +423,8 @@ def run_python_code(code_string: str, input_data: str = "") -> dict:
             with open(py_file, "w", encoding='utf-8') as f:
                 f.write(code_string)
             log.append(f"Python code written to {py_file}")
-            print(f" Python code saved to: {py_file}")
         except Exception as e:
-            print(f" Failed to write Python file: {e}")
+            tracer.event("error", "python.write_failed", error=str(e))
             return {
                 "stdout": "",
                 "stderr": f"Failed to write Python file: {e}",
@@ -212,49 +433,137 @@ def run_python_code(code_string: str, input_data: str = "") -> dict:
                 "log": "\n".join(log)
             }
 
-        execute_command = ["python3", py_file]
+        # Same interpreter as the warm worker pool and the dataset test runner
+        execute_command = [sys.executable, py_file]
         log.append(f"Executing with command: {' '.join(execute_command)}")
-        print(f" Running Python code...")
-        run_stdout, run_stderr, run_returncode, run_success = \
-            _execute_command(execute_command, input_data=input_data)
+        run_stdout, run_stderr, run_returncode, run_success, run_truncated = \
+            await _execute_command_async(execute_command, input_data=input_data, timeout=timeout)
 
         if not run_success:
             full_success = False
             log.append(f"Execution Failed (Return Code: {run_returncode}):")
             if run_stdout: log.append(f"Run STDOUT:\n{run_stdout}")
             if run_stderr: log.append(f"Run STDERR:\n{run_stderr}")
-            print(f" Python execution failed!")
         else:
             log.append("Execution Successful.")
-            print(f" Python execution successful!")
 
         result = {
             "stdout": run_stdout,
             "stderr": run_stderr,
             "returncode": run_returncode,
             "success": full_success and run_success,
+            "truncated": run_truncated,
             "log": "\n".join(log)
         }
         
-        print(f" Python Result: {result}")
+        tracer.event("debug", "python.result", success=result["success"], payload={"result": result})
         return result
 
+def run_python_tests(code_string: str, test_names: List[str], max_parallel: int = 1) -> Dict[str, dict]:
+    """
+    Runs every test function against the Python code in a warm worker: the code is
+    loaded once and each test runs in a forked child.
+    Returns {test_name: result} where each result has the same shape as the run_python_code result.
+    """
+    start_time = time.perf_counter()
+    with get_sandbox_pool().sandbox() as scratch_dir:
+        replies = get_python_worker_pool().run_tests(
+            code_string, test_names, timeout=default_timeout, max_parallel=max_parallel,
+            scratch_dir=scratch_dir, max_output_bytes=default_max_output_bytes,
+        )
+    get_tracer().event(
+        "info", "python.tests", tests=len(test_names),
+        passed=sum(1 for reply in replies.values() if reply["returncode"] == 0),
+        duration=round(time.perf_counter() - start_time, 6),
+    )
+
+    results = {}
+    for name in test_names:
+        reply = replies[name]
+        returncode = reply["returncode"]
+        success = (returncode == 0)
+        log = [f"Executing {name} in a forked Python worker"]
+        if success:
+            log.append("Execution Successful.")
+        else:
+            log.append(f"Execution Failed (Return Code: {returncode}):")
+            if reply["stdout"].strip(): log.append(f"Run STDOUT:\n{reply['stdout'].strip()}")
+            if reply["stderr"].strip(): log.append(f"Run STDERR:\n{reply['stderr'].strip()}")
+        results[name] = {
+            "stdout": reply["stdout"].strip(),
+            "stderr": reply["stderr"].strip(),
+            "returncode": returncode,
+            "success": success,
+            "truncated": reply.get("truncated", False),
+            "log": "\n".join(log)
+        }
+    return results
+
 def extract_cpp_test_names(cpp_tests: str) -> List[str]:
     return TEST_NAME_CPP.findall(cpp_tests or "")
 
 def extract_python_test_names(py_tests: str) -> List[str]:
     return TEST_NAME_PY.findall(py_tests or "")
 
+def _build_cpp_test_program(legacy_code: str, cpp_tests: str, name: str) -> str:
+    # Build per-test C++ program: original + tests + driver main that calls the one test
+    cpp_driver = f"""
+int main() {{
+    {name}();
+    return 0;
+}}
+"""
+    return "\n".join([legacy_code, cpp_tests, cpp_driver])
+
+def _build_python_test_program(translated_code: str, py_tests: str, name: str) -> str:
+    # Build per-test Python script: translated + tests + call the one test
+    py_driver = f"""
+if __name__ == "__main__":
+    {name}()
+"""
+    return "\n".join([translated_code, py_tests, py_driver])
+
+def _compare_test_results(name: str, cpp_res: dict, py_res: dict) -> Dict:
+    """Compare the C++ and Python result dicts of a single test"""
+    cpp_ok = cpp_res.get("success", False) and cpp_res.get("returncode", 1) == 0
+    py_ok = py_res.get("success", False) and py_res.get("returncode", 1) == 0
+
+    # Compare success + stdout exactly (when both ran)
+    outputs_match = (
+        cpp_ok and py_ok and
+        (cpp_res.get("stdout","").strip() == py_res.get("stdout","").strip())
+    )
+
+    return {
+        "name": name,
+        "cpp_ok": cpp_ok,
+        "py_ok": py_ok,
+        "cpp_stdout": (cpp_res.get("stdout","") or "").strip(),
+        "py_stdout": (py_res.get("stdout","") or "").strip(),
+        "cpp_stderr": (cpp_res.get("stderr","") or "").strip(),
+        "py_stderr": (py_res.get("stderr","") or "").strip(),
+        "truncated": bool(cpp_res.get("truncated") or py_res.get("truncated")),
+        "passed": outputs_match,
+    }
+
 def run_and_compare_tests(
     legacy_code: str,
     translated_code: str,
     cpp_tests: str,
     py_tests: str,
+    compile_once: bool = True,
+    max_workers: Optional[int] = None,
+    warm_python: Optional[bool] = None,
 ) -> Dict:
     """
     More info about this method:
     - Appends a single test at a time to each program
-    - Runs C++ and Python separately
+    - With compile_once, the C++ side is compiled a single time with a dispatching main
+      and each test is selected by name; otherwise one binary is compiled per test
+    - Runs the C++ and Python side of every test concurrently, at most max_workers
+      (default TEST_MAX_WORKERS) processes at a time; details keep the test declaration order
+    - With warm_python (default PYTHON_WORKER_POOL), the Python side loads the translated
+      code once in a warm worker and forks a child per test
     - Compares outputs and errors
     Returns: {
         "total": int, "passed": int, "failed": int, "success_rate": float,
@@ -263,63 +572,96 @@ def run_and_compare_tests(
            {"name": str, "cpp_ok": bool, "py_ok": bool,
             "cpp_stdout": str, "py_stdout": str,
             "cpp_stderr": str, "py_stderr": str,
-            "passed": bool}
+            "truncated": bool, "passed": bool}
         ]
     }
     """
+    return run_sync(run_and_compare_tests_async(
+        legacy_code, translated_code, cpp_tests, py_tests,
+        compile_once=compile_once, max_workers=max_workers, warm_python=warm_python,
+    ))
+
+async def _gather(coros):
+    return list(await asyncio.gather(*coros))
+
+async def _bounded(semaphore: asyncio.Semaphore, coro):
+    async with semaphore:
+        return await coro
+
+@asynccontextmanager
+async def _permits(semaphore: asyncio.Semaphore, count: int):
+    """Hold count permits of semaphore"""
+    taken = 0
+    try:
+        for _ in range(count):
+            await semaphore.acquire()
+            taken += 1
+        yield
+    finally:
+        for _ in range(taken):
+            semaphore.release()
+
+async def run_and_compare_tests_async(
+    legacy_code: str,
+    translated_code: str,
+    cpp_tests: str,
+    py_tests: str,
+    compile_once: bool = True,
+    max_workers: Optional[int] = None,
+    warm_python: Optional[bool] = None,
+) -> Dict:
+    """Async version of run_and_compare_tests, returning the same summary dict."""
     cpp_names = extract_cpp_test_names(cpp_tests)
     py_names  = extract_python_test_names(py_tests)
 
     # Require 1:1 matching names
     common = [n for n in cpp_names if n in py_names]
- 
-    results = []
-    passed_count = 0
-
-    for name in common:
-        # Build per-test C++ program: original + tests + driver main that calls the one test
-        cpp_driver = f"""
-int main() {{
-    {name}();
-    return 0;
-}}
-"""
-        cpp_full = "\n".join([legacy_code, cpp_tests, cpp_driver])
-
-        cpp_res = run_cpp_code(cpp_full)  # expects dict with stdout/stderr/success/returncode/log
-        cpp_ok = cpp_res.get("success", False) and cpp_res.get("returncode", 1) == 0
-
-        # Build per-test Python script: translated + tests + call the one test
-        py_driver = f"""
-if __name__ == "__main__":
-    {name}()
-"""
-        py_full = "\n".join([translated_code, py_tests, py_driver])
 
-        py_res = run_python_code(py_full)  # expects dict with stdout/stderr/success/returncode/log
-        py_ok = py_res.get("success", False) and py_res.get("returncode", 1) == 0
-        
-        # Compare success + stdout exactly (when both ran)
-        outputs_match = (
-            cpp_ok and py_ok and
-            (cpp_res.get("stdout","").strip() == py_res.get("stdout","").strip())
-        )
-        passed = outputs_match
-
-        results.append({
-            "name": name,
-            "cpp_ok": cpp_ok,
-            "py_ok": py_ok,
-            "cpp_stdout": (cpp_res.get("stdout","") or "").strip(),
-            "py_stdout": (py_res.get("stdout","") or "").strip(),
-            "cpp_stderr": (cpp_res.get("stderr","") or "").strip(),
-            "py_stderr": (py_res.get("stderr","") or "").strip(),
-            "passed": passed,
-        })
-
-        if passed:
-            passed_count += 1
+    workers = max(1, max_workers or default_max_workers)
+    if warm_python is None:
+        warm_python = use_python_worker_pool
+    warm_python = warm_python and PythonWorkerPool.is_supported()
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run_python_side() -> Dict[str, dict]:
+        if not common:
+            return {}
+        if warm_python:
+            # The warm worker pool is blocking, so it runs on a helper thread. Its forked
+            # children count against this call's workers and the process-wide slots.
+            parallel = min(workers, len(common))
+            async with _permits(semaphore, parallel), execution_slots(parallel):
+                return await asyncio.to_thread(
+                    run_python_tests, "\n".join([translated_code, py_tests]), common, max_parallel=parallel
+                )
+        results = await asyncio.gather(*(
+            _bounded(semaphore, run_python_code_async(_build_python_test_program(translated_code, py_tests, name)))
+            for name in common
+        ))
+        return dict(zip(common, results))
+
+    async def run_cpp_side() -> Dict[str, dict]:
+        if not common:
+            return {}
+        if compile_once:
+            # Legacy code is precompiled once per program; only tests + dispatching main are compiled here.
+            return await run_cpp_tests_async(cpp_tests, common, header_code=legacy_code, semaphore=semaphore)
+        results = await asyncio.gather(*(
+            _bounded(semaphore, run_cpp_code_async(_build_cpp_test_program(legacy_code, cpp_tests, name)))
+            for name in common
+        ))
+        return dict(zip(common, results))
+
+    # Python tests start right away and overlap with the C++ compilation.
+    py_results, cpp_results = await asyncio.gather(run_python_side(), run_cpp_side())
+
+    # Collect in declaration order so details stay deterministic.
+    results = [
+        _compare_test_results(name, cpp_results[name], py_results[name])
+        for name in common
+    ]
 
+    passed_count = sum(1 for r in results if r["passed"])
     total = len(common)
     summary = {
         "total": total,
@@ -331,74 +673,224 @@ if __name__ == "__main__":
     }
     return summary
 
-def run_python_tests_from_dataset(translated_code: str, py_tests: str) -> dict:
-    """
-    Runs ALL tests from ClassEval dataset against the translated code and captures output.
-    Adds error handling for unexpected scenarios.
-    """
-    py_driver = """
-import unittest, sys
+# Appended to the ClassEval program: runs the unittest suite (or the test ids in CT_TEST_IDS)
+# and appends one JSON line per finished test to CT_RESULTS_PATH.
+DATASET_TEST_DRIVER = """
+import unittest, sys, os, json, time
+
+class _StructuredTestResult(unittest.TextTestResult):
+    def startTest(self, test):
+        self._ct_start = time.perf_counter()
+        super().startTest(test)
+
+    def _ct_record(self, test, outcome, err=None):
+        started = getattr(self, "_ct_start", None)
+        entry = {
+            "id": test.id().replace("__main__.", "", 1),
+            "outcome": outcome,
+            "duration": round(time.perf_counter() - started, 6) if started else 0.0,
+        }
+        if err is not None:
+            entry["message"] = err if isinstance(err, str) else self._exc_info_to_string(err, test)
+        with open(os.environ["CT_RESULTS_PATH"], "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\\n")
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._ct_record(test, "passed")
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._ct_record(test, "failed", err)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._ct_record(test, "error", err)
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._ct_record(test, "skipped", reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._ct_record(test, "passed")
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._ct_record(test, "failed", "unexpected success")
 
 if __name__ == "__main__":
     loader = unittest.defaultTestLoader
-    suite = loader.loadTestsFromModule(sys.modules["__main__"])
-    runner = unittest.TextTestRunner(verbosity=2)
+    module = sys.modules["__main__"]
+    test_ids = json.loads(os.environ.get("CT_TEST_IDS", "[]"))
+    if test_ids:
+        suite = unittest.TestSuite(loader.loadTestsFromName(test_id, module) for test_id in test_ids)
+    else:
+        suite = loader.loadTestsFromModule(module)
+    runner = unittest.TextTestRunner(verbosity=2, resultclass=_StructuredTestResult)
     result = runner.run(suite)
     print("TEST_PASS" if result.wasSuccessful() else "TEST_FAIL")
 """
 
-    py_full = "\n".join([translated_code, py_tests, py_driver])
+# Number of parallel shards run_python_tests_from_dataset splits the test methods into
+default_test_shards = int(os.getenv("PYTHON_TEST_SHARDS", "1"))
 
+def discover_python_test_ids(py_tests: str) -> List[str]:
+    """
+    Statically finds "Class.test_method" ids of unittest.TestCase subclasses.
+    Returns an empty list when the tests cannot be parsed.
+    """
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w") as temp:
-            temp.write(py_full)
-            temp_path = temp.name
+        tree = ast.parse(py_tests or "")
+    except SyntaxError:
+        return []
+
+    test_ids = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        base_names = [ast.unparse(base) for base in node.bases]
+        if not any(name.endswith("TestCase") for name in base_names):
+            continue
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test"):
+                test_ids.append(f"{node.name}.{item.name}")
+    return test_ids
+
+def _read_test_results(results_path: str) -> List[dict]:
+    """
+    Per-test records of a shard's results file. A shard killed mid-write leaves a torn
+    last line; lines that are not complete records are skipped, so those tests count as
+    never reached.
+    """
+    tests = []
+    if not os.path.exists(results_path):
+        return tests
+    with open(results_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "id" in record:
+                tests.append(record)
+    return tests
+
+async def _run_python_test_shard_async(
+    py_full: str,
+    test_ids: List[str],
+    timeout: float,
+    expected_ids: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Runs one shard of the dataset tests in its own interpreter (empty test_ids runs the whole module).
+    Per-test outcomes are read from the results file, so tests finished before the shard is
+    killed are still reported; expected ids (default test_ids) never reached are marked
+    "timeout", or "output_limit" when the shard was killed for exceeding the output cap.
+    """
+    with get_sandbox_pool().sandbox() as tmpdir:
+        program_path = os.path.join(tmpdir, "program.py")
+        results_path = os.path.join(tmpdir, "results.jsonl")
+        with open(program_path, "w", encoding="utf-8") as f:
+            f.write(py_full)
+
+        env = dict(os.environ, CT_RESULTS_PATH=results_path, CT_TEST_IDS=json.dumps(test_ids))
+        start_time = time.perf_counter()
+        stdout, stderr, returncode, _, truncated = await _execute_command_async(
+            [sys.executable, program_path], timeout=timeout, env=env
+        )
+        timed_out = returncode == -1 and stderr.startswith("TimeoutExpired")
+        duration = time.perf_counter() - start_time
 
-        try:
-            proc = subprocess.run(
-                [sys.executable, temp_path],
-                capture_output=True,
-                text=True,
-                timeout=default_timeout
-            )
+        tests = _read_test_results(results_path)
 
-            stdout = proc.stdout.strip()
-            stderr = proc.stderr.strip()
-            success = proc.returncode == 0
+    if timed_out or truncated:
+        reported = {t["id"] for t in tests}
+        tests.extend(
+            {"id": test_id, "outcome": "timeout" if timed_out else "output_limit", "duration": None}
+            for test_id in (expected_ids if expected_ids is not None else test_ids)
+            if test_id not in reported
+        )
 
-            return {
-                "success": success,
-                "stdout": stdout,
-                "stderr": stderr,
-                "result": "PASS" if "TEST_PASS" in stdout else "FAIL"
-            }
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": returncode,
+        "timed_out": timed_out,
+        "truncated": truncated,
+        "duration": duration,
+        "tests": tests,
+    }
 
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "stdout": "",
-                "stderr": f"TimeoutExpired: Test execution exceeded {default_timeout} seconds.",
-                "result": "ERROR"
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "stdout": "",
-                "stderr": f"Unexpected error during test execution: {e}",
-                "result": "ERROR"
-            }
-        finally:
-            try:
-                os.unlink(temp_path)
-            except Exception:
-                pass
+def run_python_tests_from_dataset(
+    translated_code: str,
+    py_tests: str,
+    shards: Optional[int] = None,
+    shard_timeout: Optional[float] = None,
+) -> dict:
+    """
+    Runs ALL tests from ClassEval dataset against the translated code and captures output.
+    Adds error handling for unexpected scenarios.
+    Test methods can be split across `shards` parallel interpreters (default PYTHON_TEST_SHARDS),
+    each with its own timeout (default default_timeout). Besides the overall PASS/FAIL/ERROR
+    result, every test is reported with its outcome (passed/failed/error/skipped/timeout/
+    output_limit) and duration, and summed up in "counts".
+    """
+    py_full = "\n".join([translated_code, py_tests, DATASET_TEST_DRIVER])
+    shard_timeout = shard_timeout or default_timeout
+    shards = max(1, shards or default_test_shards)
+
+    # Round-robin shards of "Class.test_method" ids; an empty id list runs the whole module.
+    test_ids = discover_python_test_ids(py_tests)
+    if shards > 1 and len(test_ids) > 1:
+        shard_ids = [test_ids[i::shards] for i in range(min(shards, len(test_ids)))]
+    else:
+        shard_ids = [[]]
 
+    try:
+        if len(shard_ids) == 1:
+            shard_runs = [_run_python_test_shard_async(py_full, shard_ids[0], shard_timeout, expected_ids=test_ids)]
+        else:
+            shard_runs = [_run_python_test_shard_async(py_full, ids, shard_timeout) for ids in shard_ids]
+        shard_results = run_sync(_gather(shard_runs))
     except Exception as e:
         return {
             "success": False,
             "stdout": "",
-            "stderr": f"Unexpected error preparing test file: {e}",
-            "result": "ERROR"
+            "stderr": f"Unexpected error during test execution: {e}",
+            "result": "ERROR",
+            "tests": [],
+            "counts": {},
         }
-    
 
+    tests = [t for shard in shard_results for t in shard["tests"]]
+    counts = {
+        "total": len(tests),
+        "passed": sum(1 for t in tests if t["outcome"] == "passed"),
+        "failed": sum(1 for t in tests if t["outcome"] == "failed"),
+        "errors": sum(1 for t in tests if t["outcome"] == "error"),
+        "skipped": sum(1 for t in tests if t["outcome"] == "skipped"),
+        "timeouts": sum(1 for t in tests if t["outcome"] == "timeout"),
+        "output_limit": sum(1 for t in tests if t["outcome"] == "output_limit"),
+    }
+
+    success = all(shard["returncode"] == 0 for shard in shard_results)
+    if all(shard["timed_out"] for shard in shard_results) and not any(t["outcome"] != "timeout" for t in tests):
+        result = "ERROR"
+    elif success and all("TEST_PASS" in shard["stdout"] for shard in shard_results):
+        result = "PASS"
+    else:
+        result = "FAIL"
+
+    return {
+        "success": success,
+        "stdout": "\n".join(shard["stdout"] for shard in shard_results if shard["stdout"]),
+        "stderr": "\n".join(shard["stderr"] for shard in shard_results if shard["stderr"]),
+        "result": result,
+        "tests": tests,
+        "counts": counts,
+        "truncated": any(shard["truncated"] for shard in shard_results),
+        "duration": max(shard["duration"] for shard in shard_results),
+    }
@@ -1,6 +1,7 @@
 import ast
-from typing import Dict
+from typing import Dict, Optional
 
+from .execution_tracing import get_tracer
 from .output_testing import  find_gpp
 
 GPP_PATH = find_gpp()
@@ -13,31 +14,63 @@ def validate_python_syntax(
     Validate the translated Python code to check if it compiles without any errors.
     """
 
-    print(f"\n [PYTHON SYNTAX VALIDATION] Validating Python syntax...")
-    print(f" Code length: {len(translated_code)} characters")
+    tracer = get_tracer()
 
     try:
         # Parse the code to check for syntax errors
         ast.parse(translated_code)
         # Try compiling the code to bytecode
         compile(translated_code, "<string>", "exec")
-        print(f" Python syntax is valid!")
+        tracer.event("info", "python.validation", valid=True, code_bytes=len(translated_code))
         return {
             "valid": True,
             "errors": [],
             "message": "Python syntax is valid"
         }
     except SyntaxError as e:
-        print(f" Python syntax error: {e.msg} at line {e.lineno}")
+        tracer.event("info", "python.validation", valid=False, code_bytes=len(translated_code),
+                     error=f"SyntaxError: {e.msg} at line {e.lineno}")
         return {
             "valid": False,
             "errors": [f"SyntaxError: {e.msg} at line {e.lineno}"],
             "message": f"Python syntax error: {e.msg}"
         }
     except Exception as e:
-        print(f" Unexpected error: {str(e)}")
+        tracer.event("warning", "python.validation", valid=False, code_bytes=len(translated_code),
+                     error=str(e))
         return {
             "valid": False,
             "errors": [f"Error: {str(e)}"],
             "message": f"Unexpected error: {str(e)}"
         }
+
+def validation_fast_path(translated_code: str) -> Optional[str]:
+    """
+    Validation summary for the VALIDATION phase computed locally, in the format the
+    Code_Validator agent is asked to produce.
+    Returns None when the result is not conclusive and the LLM validator should run.
+    """
+    if not translated_code or not translated_code.strip():
+        return (
+            "Validation Summary\n"
+            "- Syntax Errors: None\n"
+            "- Compilation Issues: None\n"
+            "- Structural Problems: No Python code was produced"
+        )
+
+    result = validate_python_syntax(translated_code)
+    if result["valid"]:
+        return (
+            "Validation Summary\n"
+            "- Syntax Errors: None\n"
+            "- Compilation Issues: None\n"
+            "- Structural Problems: None"
+        )
+    if result["errors"][0].startswith("SyntaxError"):
+        return (
+            "Validation Summary\n"
+            f"- Syntax Errors: {'; '.join(result['errors'])}\n"
+            "- Compilation Issues: Code does not compile\n"
+            "- Structural Problems: None"
+        )
+    return None
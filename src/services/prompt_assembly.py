@@ -0,0 +1,148 @@
+import os
+import threading
+from string import Formatter
+from typing import Dict, List, Tuple
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+# Per-phase prompt budget in tokens when a phase config sets none (0 = unlimited)
+default_token_budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "0"))
+
+TRUNCATION_MARKER = "\n... [{tokens} tokens truncated] ...\n"
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise ~4 characters per token"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def split_template(template: str) -> Tuple[str, List[Tuple[str, str]], str]:
+    """
+    Split a format template into (instructions, sections, tail).
+    Each section is (label, field) where label is the literal text right before the
+    field; the first field's label is the last line before it, and everything above
+    that line is the static instructions. tail is the literal text after the last field.
+    """
+    instructions, sections, tail = "", [], ""
+    for literal, field, _, _ in Formatter().parse(template):
+        if field is None:
+            if sections:
+                tail = literal
+            else:
+                instructions = literal
+        elif not sections:
+            split_at = literal.rstrip().rfind("\n") + 1
+            instructions = literal[:split_at]
+            sections.append((literal[split_at:], field))
+        else:
+            sections.append((literal, field))
+    return instructions, sections, tail
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of text within roughly max_tokens"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep_chars = max(0, int(len(text) * max_tokens / tokens))
+    head, tail = keep_chars * 2 // 3, keep_chars // 3
+    return text[:head] + TRUNCATION_MARKER.format(tokens=tokens - max_tokens) + (text[-tail:] if tail else "")
+
+class PromptAssembler:
+    """
+    Builds phase prompts from the existing templates so that consecutive calls share
+    the longest possible prefix with the model server's KV cache.
+
+    The static instructions of a template always come first, followed by the variable
+    sections in the phase's "section_order" (stable inputs such as the C++ code first,
+    per-retry inputs such as reviews last; defaults to template order). When the prompt
+    exceeds the phase's "token_budget" the sections in "truncate_order" (default: last
+    section first) are shortened, keeping their head and tail.
+    Per-phase statistics record tokens per section, truncation, and how much of each
+    prompt repeats the prefix of the previous prompt sent to the same agent.
+    """
+
+    def __init__(self, default_budget: int = default_token_budget):
+        self.default_budget = default_budget
+        self._lock = threading.Lock()
+        self._last_prompt: Dict[str, str] = {}
+        self._stats: Dict[str, Dict] = {}
+
+    def assemble(self, phase_name: str, phase_config: Dict, prompt_kwargs: Dict, agent_name: str = "") -> str:
+        """Render the phase prompt within its token budget and record statistics"""
+        instructions, sections, tail = split_template(phase_config["prompt_template"])
+        order = phase_config.get("section_order") or []
+        sections.sort(key=lambda s: order.index(s[1]) if s[1] in order else len(order))
+        values = {field: str(prompt_kwargs.get(field, "")) for _, field in sections}
+
+        static_tokens = estimate_tokens(instructions) + estimate_tokens(tail) + sum(
+            estimate_tokens(label) for label, _ in sections
+        )
+        section_tokens = {field: estimate_tokens(value) for field, value in values.items()}
+        budget = phase_config.get("token_budget", self.default_budget) or 0
+        truncated = 0
+        if budget and static_tokens + sum(section_tokens.values()) > budget:
+            truncate_order = phase_config.get("truncate_order") or [field for _, field in reversed(sections)]
+            excess = static_tokens + sum(section_tokens.values()) - budget
+            for field in truncate_order:
+                if excess <= 0 or field not in values:
+                    continue
+                keep = max(0, section_tokens[field] - excess)
+                values[field] = _truncate(values[field], keep)
+                removed = section_tokens[field] - keep
+                truncated += removed
+                excess -= removed
+                section_tokens[field] = keep
+
+        message = instructions + "".join(label + values[field] for label, field in sections) + tail
+        self._record(phase_name, agent_name or phase_name, message, static_tokens, section_tokens, truncated)
+        return message
+
+    def _record(self, phase_name, cache_key, message, static_tokens, section_tokens, truncated):
+        with self._lock:
+            previous = self._last_prompt.get(cache_key, "")
+            self._last_prompt[cache_key] = message
+            stats = self._stats.setdefault(phase_name, {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "static_tokens": 0,
+                "section_tokens": {},
+                "shared_prefix_tokens": 0,
+                "truncated_tokens": 0,
+                "truncated_calls": 0,
+            })
+        shared_prefix_tokens = estimate_tokens(os.path.commonprefix([previous, message])) if previous else 0
+        with self._lock:
+            stats["calls"] += 1
+            stats["prompt_tokens"] += static_tokens + sum(section_tokens.values())
+            stats["static_tokens"] += static_tokens
+            for field, tokens in section_tokens.items():
+                stats["section_tokens"][field] = stats["section_tokens"].get(field, 0) + tokens
+            stats["shared_prefix_tokens"] += shared_prefix_tokens
+            stats["truncated_tokens"] += truncated
+            stats["truncated_calls"] += 1 if truncated else 0
+
+    def report(self) -> Dict[str, Dict]:
+        """Per-phase averages: prompt tokens, tokens per section and shared-prefix ratio"""
+        report = {}
+        with self._lock:
+            for phase_name, stats in self._stats.items():
+                calls = stats["calls"] or 1
+                report[phase_name] = {
+                    "calls": stats["calls"],
+                    "avg_prompt_tokens": stats["prompt_tokens"] / calls,
+                    "avg_static_tokens": stats["static_tokens"] / calls,
+                    "avg_section_tokens": {k: v / calls for k, v in stats["section_tokens"].items()},
+                    "avg_shared_prefix_tokens": stats["shared_prefix_tokens"] / calls,
+                    "shared_prefix_ratio": (
+                        stats["shared_prefix_tokens"] / stats["prompt_tokens"] if stats["prompt_tokens"] else 0.0
+                    ),
+                    "truncated_calls": stats["truncated_calls"],
+                    "truncated_tokens": stats["truncated_tokens"],
+                }
+        return report
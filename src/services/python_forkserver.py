@@ -0,0 +1,211 @@
+"""
+Fork server for running many test functions against one Python program.
+
+Started as a standalone script by PythonWorkerPool. The interpreter starts and
+pre-imports common modules while it waits for work, then reads a single JSON job
+from stdin: {"code": str, "tests": [str], "timeout": float, "max_parallel": int,
+"scratch_dir": str | null, "max_output_bytes": int}.
+The program is executed once as __main__, with the scratch directory as sys.path[0]
+like a script run from it, and every test function is run in a forked child with
+its own stdout/stderr. One JSON line per test is written back:
+{"name": str, "stdout": str, "stderr": str, "returncode": int, "truncated": bool}.
+Captured output files are capped with RLIMIT_FSIZE, so a child that prints past
+max_output_bytes is killed by SIGXFSZ as soon as it crosses the cap.
+"""
+import contextlib
+import json
+import os
+import resource
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+# Pre-import modules translated programs and tests commonly use, so children start warm.
+import collections, datetime, functools, itertools, math, random, re, string, typing, unittest  # noqa: F401,E401
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _run_captured(fn, out_path, err_path):
+    """Run fn with fd 1/2 redirected to files and return its exit code"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    out_fd = os.open(out_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    err_fd = os.open(err_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    os.dup2(out_fd, 1)
+    os.dup2(err_fd, 2)
+    try:
+        fn()
+        returncode = 0
+    except SystemExit as e:
+        returncode = _exit_code(e)
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        for fd in (out_fd, err_fd, *saved):
+            os.close(fd)
+    return returncode
+
+
+@contextlib.contextmanager
+def _scratch_dir(path):
+    """Use the caller's scratch directory when given, otherwise a private temp dir"""
+    if path:
+        yield path
+    else:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield tmpdir
+
+
+def _read(path, limit=-1):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read(limit)
+
+
+def _exceeds(path, limit):
+    return bool(limit) and os.path.getsize(path) >= limit
+
+
+class _LoadTimeout(BaseException):
+    pass
+
+
+def main():
+    # Keep the protocol on private descriptors; the program sees an empty stdin.
+    proto_in = os.fdopen(os.dup(0), "r", encoding="utf-8")
+    proto_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    job = json.loads(proto_in.read())
+    timeout = float(job.get("timeout", 10))
+    max_parallel = max(1, int(job.get("max_parallel", 1)))
+    tests = list(job.get("tests", []))
+    max_output_bytes = int(job.get("max_output_bytes") or 0)
+    if max_output_bytes:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (max_output_bytes, resource.getrlimit(resource.RLIMIT_FSIZE)[1]))
+    limit = max_output_bytes or -1
+    output_limit_message = f"OutputLimitExceeded: output exceeded {max_output_bytes} bytes, process killed.\n"
+
+    def send(result):
+        proto_out.write(json.dumps(result) + "\n")
+        proto_out.flush()
+
+    with _scratch_dir(job.get("scratch_dir")) as tmpdir:
+        # A cold `python program.py` in the sandbox sees the sandbox as sys.path[0], not this
+        # script's directory; match it so tests cannot import modules next to the server.
+        sys.path[0] = tmpdir
+        load_out_path = os.path.join(tmpdir, "load.out")
+        load_err_path = os.path.join(tmpdir, "load.err")
+        namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+
+        def load():
+            exec(compile(job["code"], "program.py", "exec"), namespace)
+
+        load_timed_out = []
+
+        def on_alarm(signum, frame):
+            load_timed_out.append(True)
+            raise _LoadTimeout()
+
+        signal.signal(signal.SIGALRM, on_alarm)
+        signal.alarm(max(1, int(timeout)))
+        load_returncode = _run_captured(load, load_out_path, load_err_path)
+        signal.alarm(0)
+        load_stdout = _read(load_out_path, limit)
+        load_stderr = _read(load_err_path, limit)
+        load_truncated = _exceeds(load_out_path, max_output_bytes) or _exceeds(load_err_path, max_output_bytes)
+
+        if load_truncated:
+            load_stderr = output_limit_message + load_stderr
+            load_returncode = -3
+        elif load_timed_out:
+            load_stdout = ""
+            load_stderr = f"TimeoutExpired: Command took too long to execute ({timeout:g} seconds)."
+            load_returncode = -1
+
+        if load_returncode != 0:
+            for name in tests:
+                send({
+                    "name": name,
+                    "stdout": load_stdout,
+                    "stderr": load_stderr,
+                    "returncode": load_returncode,
+                    "truncated": load_truncated,
+                })
+            return
+
+        pending = list(tests)
+        running = {}
+        launched = 0
+        while pending or running:
+            while pending and len(running) < max_parallel:
+                name = pending.pop(0)
+                out_path = os.path.join(tmpdir, f"{launched}.out")
+                err_path = os.path.join(tmpdir, f"{launched}.err")
+                launched += 1
+                pid = os.fork()
+                if pid == 0:
+                    # Die on the first write past the output cap instead of failing silently.
+                    signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+                    # Same lookup as the per-test script driver: `<name>()` in module scope.
+                    returncode = _run_captured(lambda: eval(name, namespace)(), out_path, err_path)
+                    os._exit(returncode & 0xFF)
+                running[pid] = (name, time.monotonic(), out_path, err_path)
+
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                now = time.monotonic()
+                for child, (name, started, out_path, err_path) in list(running.items()):
+                    if now - started > timeout:
+                        os.kill(child, signal.SIGKILL)
+                        os.waitpid(child, 0)
+                        running.pop(child)
+                        send({
+                            "name": name,
+                            "stdout": load_stdout + _read(out_path, limit),
+                            "stderr": f"TimeoutExpired: Command took too long to execute ({timeout:g} seconds).\n"
+                                      + load_stderr + _read(err_path, limit),
+                            "returncode": -1,
+                            "truncated": False,
+                        })
+                time.sleep(0.001)
+                continue
+
+            if pid not in running:
+                continue
+            name, _, out_path, err_path = running.pop(pid)
+            truncated = os.WIFSIGNALED(status) and os.WTERMSIG(status) == signal.SIGXFSZ
+            if truncated:
+                returncode = -3
+            elif os.WIFEXITED(status):
+                returncode = os.WEXITSTATUS(status)
+            else:
+                returncode = -os.WTERMSIG(status)
+            send({
+                "name": name,
+                "stdout": load_stdout + _read(out_path, limit),
+                "stderr": (output_limit_message if truncated else "") + load_stderr + _read(err_path, limit),
+                "returncode": returncode,
+                "truncated": truncated,
+            })
+
+
+if __name__ == "__main__":
+    main()
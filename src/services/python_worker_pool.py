@@ -0,0 +1,136 @@
+import atexit
+import json
+import os
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional
+
+FORKSERVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_forkserver.py")
+
+class PythonWorkerPool:
+    """
+    Pool of pre-started Python fork servers (see python_forkserver.py).
+
+    Each idle server has already paid interpreter startup and common imports.
+    A server is taken for one program: it executes the translated code once and
+    forks a child per test function. Servers are single-use because the program
+    state lives in their memory, so a replacement is spawned as soon as one is taken.
+    """
+
+    def __init__(self, size: int = 2, python_executable: str = sys.executable):
+        self.size = size
+        self.python_executable = python_executable
+        self._idle: List[subprocess.Popen] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.fill()
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Fork servers need os.fork, so the pool is unavailable on Windows"""
+        return hasattr(os, "fork")
+
+    def _spawn(self) -> subprocess.Popen:
+        return subprocess.Popen(
+            [self.python_executable, FORKSERVER_PATH],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+        )
+
+    def fill(self) -> None:
+        """Start servers until `size` idle servers are available"""
+        with self._lock:
+            self._idle = [p for p in self._idle if p.poll() is None]
+            while not self._closed and len(self._idle) < self.size:
+                self._idle.append(self._spawn())
+
+    def _acquire(self) -> subprocess.Popen:
+        with self._lock:
+            while self._idle:
+                process = self._idle.pop(0)
+                if process.poll() is None:
+                    break
+            else:
+                process = self._spawn()
+        # Replace the taken server off the calling thread.
+        threading.Thread(target=self.fill, daemon=True).start()
+        return process
+
+    def run_tests(
+        self,
+        code_string: str,
+        test_names: List[str],
+        timeout: float,
+        max_parallel: int = 1,
+        scratch_dir: Optional[str] = None,
+        max_output_bytes: int = 0,
+    ) -> Dict[str, dict]:
+        """
+        Runs every test function against code_string in a warm server.
+        Per-test output files go to scratch_dir when given (otherwise a server-side temp dir).
+        A test whose stdout or stderr exceeds max_output_bytes (0 = unlimited) is killed.
+        Returns {test_name: {"stdout", "stderr", "returncode", "truncated"}}.
+        """
+        process = self._acquire()
+        job = json.dumps({
+            "code": code_string,
+            "tests": test_names,
+            "timeout": timeout,
+            "max_parallel": max_parallel,
+            "scratch_dir": scratch_dir,
+            "max_output_bytes": max_output_bytes,
+        })
+        # Load + every batch of tests may each take up to `timeout`.
+        batches = -(-len(test_names) // max(1, max_parallel))
+        overall_timeout = timeout * (batches + 1) + 5
+
+        stdout, stderr = "", ""
+        try:
+            stdout, stderr = process.communicate(input=job, timeout=overall_timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            stdout, stderr = process.communicate()
+
+        results: Dict[str, dict] = {}
+        for line in stdout.splitlines():
+            try:
+                reply = json.loads(line)
+            except ValueError:
+                continue
+            results[reply.pop("name")] = reply
+
+        for name in test_names:
+            if name not in results:
+                results[name] = {
+                    "stdout": "",
+                    "stderr": f"Python worker failed before reporting this test.\n{stderr}".strip(),
+                    "returncode": -2,
+                    "truncated": False,
+                }
+        return results
+
+    def close(self) -> None:
+        """Terminate all idle servers"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for process in idle:
+            if process.poll() is None:
+                process.kill()
+                process.communicate()
+
+_default_pool: Optional[PythonWorkerPool] = None
+_default_pool_lock = threading.Lock()
+
+def get_python_worker_pool() -> PythonWorkerPool:
+    """Return the process-wide worker pool, creating it on first use"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = PythonWorkerPool(size=int(os.getenv("PYTHON_WORKER_POOL_SIZE", "2")))
+            atexit.register(_default_pool.close)
+        return _default_pool
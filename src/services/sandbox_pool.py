@@ -0,0 +1,109 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+SHM_DIR = "/dev/shm"
+
+def _is_usable_root(path: str) -> bool:
+    """A sandbox root must be a writable directory that allows running executables"""
+    if not os.path.isdir(path) or not os.access(path, os.W_OK | os.X_OK):
+        return False
+    noexec = getattr(os, "ST_NOEXEC", 0)
+    try:
+        return not (noexec and os.statvfs(path).f_flag & noexec)
+    except (AttributeError, OSError):
+        return False
+
+class SandboxPool:
+    """
+    Pool of reusable scratch directories for code execution.
+
+    Directories are created once under a per-process root (on /dev/shm when it is
+    available and allows executables, otherwise the system temp dir) and are emptied
+    between runs instead of being created and deleted for every execution.
+    Acquiring never blocks: when all directories are busy a new one is created, and at
+    most `size` idle directories are kept.
+    """
+
+    def __init__(self, size: int = 8, use_shm: bool = True, base_dir: Optional[str] = None):
+        if base_dir is None:
+            base_dir = SHM_DIR if use_shm and _is_usable_root(SHM_DIR) else tempfile.gettempdir()
+        self.size = size
+        self.root = os.path.join(base_dir, f"code_sandbox-{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(self.root, exist_ok=True)
+        self._idle: List[str] = []
+        self._lock = threading.Lock()
+        self._count = 0
+        for _ in range(size):
+            self._idle.append(self._create())
+
+    def _create(self) -> str:
+        with self._lock:
+            self._count += 1
+            path = os.path.join(self.root, f"worker-{self._count}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def acquire(self) -> str:
+        """Take an empty directory out of the pool"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._create()
+
+    def release(self, path: str) -> None:
+        """Empty the directory and return it to the pool"""
+        try:
+            self._reset(path)
+        except OSError:
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(path)
+                return
+        shutil.rmtree(path, ignore_errors=True)
+
+    @staticmethod
+    def _reset(path: str) -> None:
+        for entry in os.scandir(path):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+
+    @contextmanager
+    def sandbox(self) -> Iterator[str]:
+        """Context manager yielding an empty scratch directory, drop-in for TemporaryDirectory"""
+        path = self.acquire()
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def close(self) -> None:
+        """Remove the pool root and every directory in it"""
+        with self._lock:
+            self._idle = []
+        shutil.rmtree(self.root, ignore_errors=True)
+
+_default_pool: Optional[SandboxPool] = None
+_default_pool_lock = threading.Lock()
+
+def get_sandbox_pool() -> SandboxPool:
+    """Return the process-wide sandbox pool, creating it on first use"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SandboxPool(
+                size=int(os.getenv("SANDBOX_POOL_SIZE", str(min(32, os.cpu_count() or 1)))),
+                use_shm=os.getenv("SANDBOX_USE_SHM", "1") != "0",
+                base_dir=os.getenv("SANDBOX_DIR") or None,
+            )
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -1,51 +1,404 @@
-from typing import Dict, List, Any, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple, Union
+
+# Write records kept per workspace; older ones are dropped
+default_history_limit = 256
+
+class WorkspaceEntry:
+    """One stored value; entries are never mutated, a write creates a new one"""
+    __slots__ = ("value", "agent", "version", "timestamp")
+
+    def __init__(self, value: Any, agent: str, version: int, timestamp: float):
+        self.value = value
+        self.agent = agent
+        self.version = version
+        self.timestamp = timestamp
+
+class HistoryRecord:
+    """One workspace action; timestamp is time.time()"""
+    __slots__ = ("action", "key", "agent", "version", "timestamp")
+
+    def __init__(self, action: str, key: str, agent: str, version: int, timestamp: float):
+        self.action = action
+        self.key = key
+        self.agent = agent
+        self.version = version
+        self.timestamp = timestamp
+
+class WorkspaceSnapshot:
+    """Read-only view of a workspace at one revision"""
+
+    def __init__(self, revision: int, entries: Mapping[str, WorkspaceEntry], agent_access_patterns: Dict[str, List[str]]):
+        self.revision = revision
+        self._entries = entries
+        self.agent_access_patterns = agent_access_patterns
 
-class SharedWorkspace:
-    """Shared data space for multi-agent communication"""
-    
-    def __init__(self, workspace_id: str = "default", agent_access_patterns: Dict[str, List[str]] = None):
-        self.workspace_id = workspace_id
-        self.data: Dict[str, Any] = {}
-        self.history: List[Dict[str, Any]] = []
-        self.agent_access_patterns = agent_access_patterns or {}
-        
-    def write(self, key: str, value: Any, agent_name: str) -> None:
-        """Write data to workspace with agent attribution"""
-        self.data[key] = {
-            "value": value,
-            "agent": agent_name,
-            "timestamp": self._get_timestamp()
-        }
-        self.history.append({
-            "action": "write",
-            "key": key,
-            "agent": agent_name,
-            "timestamp": self._get_timestamp()
-        })
-    
     def read(self, key: str) -> Optional[Any]:
-        """Read data from workspace"""
-        return self.data.get(key, {}).get("value")
-    
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def version(self, key: str) -> int:
+        """Revision at which key was last written, 0 when it was never written"""
+        entry = self._entries.get(key)
+        return entry.version if entry is not None else 0
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
     def get_context_for_agent(self, agent_name: str, relevant_keys: List[str] = None) -> Dict[str, Any]:
-        """Get relevant context for a specific agent"""
+        entries = self._entries
         # Get values by specific keys.
         if relevant_keys:
-            return {k: self.data[k]["value"] for k in relevant_keys if k in self.data}
-        
+            return {k: entries[k].value for k in relevant_keys if k in entries}
+
         # Else, use agent-specific access pattern from orchestration layer
-        allowed_keys = self.agent_access_patterns.get(agent_name, list(self.data.keys()))
-        
+        allowed_keys = self.agent_access_patterns.get(agent_name, list(entries))
+
         # User_Proxy can access everything by default
         if agent_name == "User_Proxy" and agent_name not in self.agent_access_patterns:
-            allowed_keys = list(self.data.keys())
-        
-        return {k: self.data[k]["value"] for k in allowed_keys if k in self.data}
-    
+            allowed_keys = list(entries)
+
+        return {k: entries[k].value for k in allowed_keys if k in entries}
+
+    def get_all_outputs(self) -> Dict[str, Any]:
+        return {k: entry.value for k, entry in self._entries.items()}
+
+class WorkspaceBackend(ABC):
+    """
+    Storage behind a SharedWorkspace.
+    Every write bumps the store's revision; entries(namespace) returns one consistent
+    revision. compare_and_set() writes only when the key is still at expected_version
+    (0 = the key must not exist yet) and returns the new revision, or None.
+    """
+
+    @abstractmethod
+    def revision(self) -> int:
+        ...
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[WorkspaceEntry]:
+        ...
+
+    @abstractmethod
+    def entries(self) -> Tuple[int, Mapping[str, WorkspaceEntry]]:
+        ...
+
+    @abstractmethod
+    def put(self, key: str, value: Any, agent_name: str, timestamp: float) -> int:
+        ...
+
+    @abstractmethod
+    def compare_and_set(self, key: str, expected_version: int, value: Any, agent_name: str, timestamp: float) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+class _EntriesAt(Mapping):
+    """Read-only view of a MemoryBackend table as it was at one revision"""
+
+    def __init__(self, table: Dict[str, List[WorkspaceEntry]], revision: int):
+        self._table = table
+        self._revision = revision
+
+    def __getitem__(self, key: str) -> WorkspaceEntry:
+        # Newest first; a key's versions only grow, and views are usually of the latest revision
+        for entry in reversed(self._table.get(key, ())):
+            if entry.version <= self._revision:
+                return entry
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key, versions in list(self._table.items()):
+            if versions[0].version <= self._revision:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+class MemoryBackend(WorkspaceBackend):
+    """
+    Process-local versioned store (the default): every key keeps its list of entries,
+    so a write appends one entry and entries() returns a view of the current revision
+    in O(1), without copying the table. clear() starts a new table; views taken
+    before keep the old one.
+    """
+
+    def __init__(self):
+        self._revision = 0
+        self._table: Dict[str, List[WorkspaceEntry]] = {}
+        self._lock = threading.Lock()
+
+    def revision(self) -> int:
+        return self._revision
+
+    def get(self, key: str) -> Optional[WorkspaceEntry]:
+        versions = self._table.get(key)
+        return versions[-1] if versions else None
+
+    def entries(self) -> Tuple[int, Mapping[str, WorkspaceEntry]]:
+        with self._lock:
+            return self._revision, _EntriesAt(self._table, self._revision)
+
+    def put(self, key: str, value: Any, agent_name: str, timestamp: float) -> int:
+        with self._lock:
+            return self._store(key, value, agent_name, timestamp)
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any, agent_name: str, timestamp: float) -> Optional[int]:
+        with self._lock:
+            current = self.get(key)
+            if (current.version if current is not None else 0) != expected_version:
+                return None
+            return self._store(key, value, agent_name, timestamp)
+
+    def _store(self, key: str, value: Any, agent_name: str, timestamp: float) -> int:
+        # The entry is complete before it is published, and the revision is bumped last,
+        # so a lock-free reader never sees a version newer than revision()
+        entry = WorkspaceEntry(value, agent_name, self._revision + 1, timestamp)
+        versions = self._table.get(key)
+        if versions is None:
+            self._table[key] = [entry]
+        else:
+            versions.append(entry)
+        self._revision += 1
+        return self._revision
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revision += 1
+            self._table = {}
+
+# (pid, path) -> (connection, lock); a forked worker opens its own connection
+_sqlite_connections: Dict[Tuple[int, str], Tuple[sqlite3.Connection, threading.Lock]] = {}
+_sqlite_connections_lock = threading.Lock()
+
+def _sqlite_connection(path: str) -> Tuple[sqlite3.Connection, threading.Lock]:
+    key = (os.getpid(), os.path.abspath(path))
+    with _sqlite_connections_lock:
+        if key not in _sqlite_connections:
+            os.makedirs(os.path.dirname(key[1]), exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workspace_entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, agent TEXT NOT NULL,"
+                " version INTEGER NOT NULL, timestamp REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS workspace_revisions ("
+                " namespace TEXT PRIMARY KEY, revision INTEGER NOT NULL)"
+            )
+            _sqlite_connections[key] = (conn, threading.Lock())
+        return _sqlite_connections[key]
+
+class SqliteBackend(WorkspaceBackend):
+    """
+    Workspace store in a local SQLite file (WAL mode), shared by every process that
+    opens the same path and namespace; the orchestrator, LLM phase workers and test
+    workers can each attach to a program's state by its key. Values are stored as JSON.
+    Writes run in BEGIN IMMEDIATE transactions, so revisions and compare_and_set are
+    atomic across processes. Timestamps are wall-clock time.time(), so they stay
+    meaningful in a file that outlives the process or is read on another host.
+    """
+
+    def __init__(self, path: str, namespace: str = "default", reset: bool = False):
+        self.path = path
+        self.namespace = namespace
+        self._conn, self._lock = _sqlite_connection(path)
+        if reset:
+            self.clear()
+
+    def revision(self) -> int:
+        with self._lock:
+            return self._revision()
+
+    def _revision(self) -> int:
+        row = self._conn.execute(
+            "SELECT revision FROM workspace_revisions WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _entry(row) -> WorkspaceEntry:
+        value, agent, version, timestamp = row
+        return WorkspaceEntry(json.loads(value), agent, version, timestamp)
+
+    def get(self, key: str) -> Optional[WorkspaceEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, agent, version, timestamp FROM workspace_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def entries(self) -> Tuple[int, Mapping[str, WorkspaceEntry]]:
+        with self._lock:
+            # One read transaction sees a single committed revision.
+            self._conn.execute("BEGIN")
+            try:
+                revision = self._revision()
+                rows = self._conn.execute(
+                    "SELECT key, value, agent, version, timestamp FROM workspace_entries"
+                    " WHERE namespace = ? ORDER BY version",
+                    (self.namespace,),
+                ).fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+        return revision, MappingProxyType({row[0]: self._entry(row[1:]) for row in rows})
+
+    def put(self, key: str, value: Any, agent_name: str, timestamp: float) -> int:
+        return self._write(key, None, value, agent_name, timestamp)
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any, agent_name: str, timestamp: float) -> Optional[int]:
+        return self._write(key, expected_version, value, agent_name, timestamp)
+
+    def _write(self, key: str, expected_version: Optional[int], value: Any, agent_name: str, timestamp: float) -> Optional[int]:
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if expected_version is not None:
+                    row = self._conn.execute(
+                        "SELECT version FROM workspace_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key),
+                    ).fetchone()
+                    if (row[0] if row else 0) != expected_version:
+                        self._conn.execute("ROLLBACK")
+                        return None
+                revision = self._revision() + 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO workspace_revisions (namespace, revision) VALUES (?, ?)",
+                    (self.namespace, revision),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO workspace_entries (namespace, key, value, agent, version, timestamp)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.namespace, key, encoded, agent_name, revision, timestamp),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return revision
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # The revision keeps counting so cached contexts never match a cleared store.
+                revision = self._revision() + 1
+                self._conn.execute("DELETE FROM workspace_entries WHERE namespace = ?", (self.namespace,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO workspace_revisions (namespace, revision) VALUES (?, ?)",
+                    (self.namespace, revision),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+def workspace_backend_factory(spec: Union[str, Callable[[str], WorkspaceBackend], None]) -> Callable[[str], WorkspaceBackend]:
+    """
+    Turn a backend spec into a per-program factory (program key -> fresh backend).
+    spec is a callable, or one of "memory" (default) or "sqlite:<path>"; SQLite
+    namespaces are the program keys and are cleared when the program starts.
+    """
+    if callable(spec):
+        return spec
+    spec = spec or "memory"
+    if spec == "memory":
+        return lambda key: MemoryBackend()
+    if spec.startswith("sqlite:"):
+        path = spec.split(":", 1)[1]
+        return lambda key: SqliteBackend(path, str(key), reset=True)
+    raise ValueError(f"Unknown workspace backend: {spec}")
+
+class SharedWorkspace:
+    """
+    Shared data space for multi-agent communication.
+
+    Versioned: every write bumps the revision of the backing store, which is
+    process-local (MemoryBackend, the default) or shared between processes
+    (SqliteBackend). snapshot() returns a view that keeps seeing its revision while
+    later writes happen, and compare_and_set() updates a key only if nobody wrote it
+    since the version the caller read. Entries and history records are compact
+    __slots__ objects stamped with time.time(); history keeps the last
+    history_limit writes made through this object. Contexts built by
+    get_context_for_agent are cached per revision.
+    """
+
+    def __init__(
+        self,
+        workspace_id: str = "default",
+        agent_access_patterns: Dict[str, List[str]] = None,
+        history_limit: int = default_history_limit,
+        backend: Optional[WorkspaceBackend] = None,
+    ):
+        self.workspace_id = workspace_id
+        self.agent_access_patterns = agent_access_patterns or {}
+        self.history: Deque[HistoryRecord] = deque(maxlen=history_limit)
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._context_cache: Dict[Tuple[str, Optional[Tuple[str, ...]]], Tuple[int, Mapping[str, Any]]] = {}
+
+    @property
+    def revision(self) -> int:
+        return self.backend.revision()
+
+    def write(self, key: str, value: Any, agent_name: str) -> None:
+        """Write data to workspace with agent attribution"""
+        timestamp = time.time()
+        revision = self.backend.put(key, value, agent_name, timestamp)
+        self.history.append(HistoryRecord("write", key, agent_name, revision, timestamp))
+
+    def compare_and_set(self, key: str, expected_version: int, value: Any, agent_name: str) -> bool:
+        """
+        Write key only if its version is still expected_version (0 = not written yet).
+        Returns False, without writing, when another writer got there first.
+        """
+        timestamp = time.time()
+        revision = self.backend.compare_and_set(key, expected_version, value, agent_name, timestamp)
+        if revision is None:
+            return False
+        self.history.append(HistoryRecord("write", key, agent_name, revision, timestamp))
+        return True
+
+    def read(self, key: str) -> Optional[Any]:
+        """Read data from workspace"""
+        entry = self.backend.get(key)
+        return entry.value if entry is not None else None
+
+    def entry(self, key: str) -> Optional[WorkspaceEntry]:
+        """The current entry for key (value, agent, version, timestamp), or None"""
+        return self.backend.get(key)
+
+    def snapshot(self) -> WorkspaceSnapshot:
+        """Consistent read-only view of the current revision"""
+        revision, entries = self.backend.entries()
+        return WorkspaceSnapshot(revision, entries, self.agent_access_patterns)
+
+    def get_context_for_agent(self, agent_name: str, relevant_keys: List[str] = None) -> Mapping[str, Any]:
+        """
+        Get relevant context for a specific agent.
+        The result is a read-only mapping, reused until the workspace changes.
+        """
+        cache_key = (agent_name, tuple(relevant_keys) if relevant_keys else None)
+        cached = self._context_cache.get(cache_key)
+        if cached is not None and cached[0] == self.backend.revision():
+            return cached[1]
+        snapshot = self.snapshot()
+        context = MappingProxyType(snapshot.get_context_for_agent(agent_name, relevant_keys))
+        self._context_cache[cache_key] = (snapshot.revision, context)
+        return context
+
     def get_all_outputs(self) -> Dict[str, Any]:
         """Get all agent outputs"""
-        return {k: v["value"] for k, v in self.data.items()}
-    
-    def _get_timestamp(self) -> str:
-        from datetime import datetime
-        return datetime.now().isoformat()
\ No newline at end of file
+        return self.snapshot().get_all_outputs()
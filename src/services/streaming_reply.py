@@ -0,0 +1,181 @@
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .execution_tracing import get_tracer
+from .prompt_assembly import estimate_tokens
+
+class BlockExtractor:
+    """
+    Incremental detector for the target block of a reply (e.g. the fenced Python code).
+    feed() takes streamed text and returns True as soon as `pattern` matches the text
+    received so far; the regex is only re-run when a chunk may have closed a block.
+    The stream stops after the first complete block, matching extract_relevant_outputs,
+    which takes the first block of a message, so a streamed reply yields the same
+    block as the full reply would.
+    """
+
+    def __init__(self, pattern: str, trigger: str = "```"):
+        self.regex = re.compile(pattern, re.DOTALL | re.IGNORECASE)
+        self.trigger = trigger
+        self.text = ""
+        self.complete = False
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete or not chunk:
+            return self.complete
+        tail_start = max(0, len(self.text) - len(self.trigger))
+        self.text += chunk
+        if self.trigger in self.text[tail_start:] and self.regex.search(self.text):
+            self.complete = True
+        return self.complete
+
+class StreamingMetrics:
+    """
+    Per-agent timings and token usage of streamed replies. Streamed replies bypass
+    autogen's client, so gather_usage_summary does not count them; tokens here are
+    estimated with prompt_assembly.estimate_tokens since an early stop never receives
+    the server's usage report.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def record(self, agent_name: str, first_token: Optional[float], first_usable: Optional[float],
+               total: float, early_stop: bool, cached: bool,
+               prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(agent_name, {
+                "calls": 0, "cached": 0, "early_stops": 0,
+                "first_token_total": 0.0, "first_usable_total": 0.0, "usable_calls": 0, "total": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0,
+            })
+            stats["calls"] += 1
+            stats["cached"] += 1 if cached else 0
+            stats["early_stops"] += 1 if early_stop else 0
+            stats["first_token_total"] += first_token or 0.0
+            if first_usable is not None:
+                stats["first_usable_total"] += first_usable
+                stats["usable_calls"] += 1
+            stats["total"] += total
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+
+    def report(self) -> Dict[str, Dict]:
+        """Average time to first token, to first usable output and per reply, and estimated tokens"""
+        report = {}
+        with self._lock:
+            for agent_name, stats in self._stats.items():
+                live = (stats["calls"] - stats["cached"]) or 1
+                report[agent_name] = {
+                    "calls": stats["calls"],
+                    "cached": stats["cached"],
+                    "early_stops": stats["early_stops"],
+                    "avg_time_to_first_token": stats["first_token_total"] / live,
+                    "avg_time_to_first_usable_output": (
+                        stats["first_usable_total"] / stats["usable_calls"] if stats["usable_calls"] else None
+                    ),
+                    "avg_reply_time": stats["total"] / stats["calls"],
+                    "estimated_prompt_tokens": stats["prompt_tokens"],
+                    "estimated_completion_tokens": stats["completion_tokens"],
+                }
+        return report
+
+streaming_metrics = StreamingMetrics()
+
+def _chat_messages(system_message: str, messages: List[Dict]) -> List[Dict]:
+    chat = [{"role": "system", "content": system_message}] if system_message else []
+    for message in messages or []:
+        if message.get("content") is None:
+            continue
+        chat.append({"role": message.get("role", "user"), "content": message["content"]})
+    return chat
+
+def make_streaming_reply(llm_config: Dict, until_pattern: str, response_cache: Any = None):
+    """
+    Build an autogen reply function that streams the completion and closes the stream
+    as soon as `until_pattern` matches, so the server stops generating the text after
+    the target block. Returns (False, None) when streaming is not possible so autogen
+    falls back to its regular completion call.
+    """
+    from openai import OpenAI
+
+    clients: Dict[int, Any] = {}
+
+    def _client(index: int, config: Dict):
+        if index not in clients:
+            kwargs = {}
+            # Like autogen, only pass a configured timeout; None would disable the client's default.
+            timeout = config.get("timeout", llm_config.get("timeout"))
+            if timeout is not None:
+                kwargs["timeout"] = timeout
+            clients[index] = OpenAI(
+                api_key=config.get("api_key") or "not-needed",
+                base_url=config.get("base_url"),
+                # Pooled keep-alive client from AgentFactory.llm_config, when present
+                http_client=config.get("http_client"),
+                **kwargs,
+            )
+        return clients[index]
+
+    def streaming_reply(recipient, messages=None, sender=None, config=None) -> Tuple[bool, Optional[str]]:
+        chat = _chat_messages(recipient.system_message, messages)
+        params = {k: llm_config[k] for k in ("temperature", "max_tokens") if k in llm_config}
+        start_time = time.perf_counter()
+
+        for index, entry in enumerate(llm_config.get("config_list", [])):
+            if entry.get("api_type", "openai") != "openai":
+                continue
+            cache_key = json.dumps(
+                {"stream_until": until_pattern, "model": entry.get("model"), "base_url": entry.get("base_url"),
+                 "params": params, "messages": chat},
+                sort_keys=True,
+            )
+            if response_cache is not None:
+                cached = response_cache.get(cache_key, None)
+                if cached is not None:
+                    streaming_metrics.record(recipient.name, None, None, time.perf_counter() - start_time,
+                                             early_stop=False, cached=True)
+                    return True, cached
+
+            extractor = BlockExtractor(until_pattern)
+            first_token = first_usable = None
+            try:
+                stream = _client(index, entry).chat.completions.create(
+                    model=entry["model"], messages=chat, stream=True, **params
+                )
+                try:
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content or ""
+                        if delta and first_token is None:
+                            first_token = time.perf_counter() - start_time
+                        if extractor.feed(delta):
+                            first_usable = time.perf_counter() - start_time
+                            break
+                finally:
+                    # Closing the response cancels the remaining generation server-side.
+                    stream.close()
+            except Exception as e:
+                # Try the next config; autogen's regular call runs when none can stream.
+                get_tracer().event("debug", "llm.stream_failed", agent=recipient.name,
+                                   model=entry.get("model"), error=f"{type(e).__name__}: {e}")
+                continue
+
+            streaming_metrics.record(
+                recipient.name, first_token, first_usable, time.perf_counter() - start_time,
+                early_stop=first_usable is not None, cached=False,
+                prompt_tokens=sum(estimate_tokens(str(m["content"])) for m in chat),
+                completion_tokens=estimate_tokens(extractor.text),
+            )
+            if response_cache is not None:
+                response_cache.set(cache_key, extractor.text)
+            return True, extractor.text
+
+        return False, None
+
+    return streaming_reply
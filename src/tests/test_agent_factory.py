@@ -0,0 +1,27 @@
+import copy
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("autogen")
+
+from ..services.agent_factory import AgentFactory
+from ..services.http_client_pool import HttpClientPool
+
+LLM_CONFIGS = {
+    "local": {
+        "config_list": [{"model": "local", "base_url": "http://localhost:11434/v1", "api_key": "x"}],
+        "temperature": 0.2,
+    },
+}
+
+def test_llm_config_survives_deepcopy_with_shared_client():
+    pool = HttpClientPool()
+    factory = AgentFactory(LLM_CONFIGS, default_model="local", response_cache=None, http_pool=pool)
+    config = factory.llm_config("local")
+
+    copied = copy.deepcopy(config)
+
+    client = config["config_list"][0]["http_client"]
+    assert copied["config_list"][0]["http_client"] is client
+    assert pool.client("http://localhost:11434/other") is client
@@ -0,0 +1,26 @@
+from ..services.agent_helpers import compile_pattern, extract_relevant_outputs
+
+def test_patterns_are_compiled_once():
+    assert compile_pattern(r"```python\n(.*?)```") is compile_pattern(r"```python\n(.*?)```")
+
+def test_newest_matching_message_wins_and_none_messages_are_skipped():
+    history = [
+        {"name": "Critic", "content": "Score: 4/10"},
+        None,
+        "Score: 9/10",
+        {"name": "Critic", "content": "no score yet"},
+    ]
+    assert extract_relevant_outputs(history, {"Critic": r"Score: (\d+)/10"}) == {"Critic": ["9"]}
+
+def test_later_patterns_take_precedence_within_a_message():
+    message = {"content": "Summary: ok\nFinal verdict: PASS"}
+    patterns = {"Critic": [r"Summary: (\w+)", r"Final verdict: (\w+)"]}
+    assert extract_relevant_outputs([message], patterns) == {"Critic": ["PASS"]}
+
+def test_code_translator_keeps_only_the_code_group():
+    message = {"content": "```py\nx = 1\n```"}
+    patterns = {"Code_Translator": r"```(python|py)\n(.*?)```", "Other": r"```(python|py)\n(.*?)```"}
+    assert extract_relevant_outputs([message], patterns) == {
+        "Code_Translator": ["x = 1\n"],
+        "Other": [("py", "x = 1\n")],
+    }
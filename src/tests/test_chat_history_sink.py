@@ -0,0 +1,36 @@
+import pytest
+
+from ..services.chat_history_sink import DiscardSink, KeepAllSink, LastNPerAgentSink, SpillSink, history_sink_factory
+
+MESSAGES = [
+    {"name": "User_Proxy", "content": "translate"},
+    {"name": "Code_Translator", "content": "draft 1"},
+    {"name": "User_Proxy", "content": "again"},
+    {"name": "Code_Translator", "content": "draft 2"},
+    {"name": "Critic", "content": "looks good"},
+]
+
+def test_last_n_per_agent_keeps_arrival_order():
+    sink = LastNPerAgentSink(1)
+    sink.extend(MESSAGES[:3])
+    sink.extend(MESSAGES[3:])
+
+    assert [m["content"] for m in sink.messages()] == ["again", "draft 2", "looks good"]
+
+def test_spill_sink_keeps_nothing_in_memory_and_reads_every_call_back(tmp_path):
+    sink = SpillSink(str(tmp_path / "spill" / "p1.jsonl.gz"))
+    sink.extend(MESSAGES[:2])
+    sink.extend([])
+    sink.extend(MESSAGES[2:])
+
+    assert sink.messages() == []
+    assert sink.read() == MESSAGES
+
+def test_factory_specs(tmp_path):
+    assert isinstance(history_sink_factory(None)("p1"), KeepAllSink)
+    assert isinstance(history_sink_factory("discard")("p1"), DiscardSink)
+    assert history_sink_factory("last:3")("p1").n == 3
+    spill = history_sink_factory(f"spill:{tmp_path}")("group/p 1")
+    assert spill.path == str(tmp_path / "group_p_1.jsonl.gz")
+    with pytest.raises(ValueError):
+        history_sink_factory("forget")
@@ -0,0 +1,33 @@
+from ..services.checkpoint_journal import CheckpointJournal
+
+def test_append_then_load_keeps_the_latest_record_per_key(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "journal.jsonl"))
+    journal.append("p1", {"status": "Failed", "duration": 1.0})
+    journal.append("p2", {"status": "Success", "duration": 2.0})
+    journal.append("p1", {"status": "Success", "duration": 3.0})
+
+    records = CheckpointJournal(journal.path).load()
+    assert {key: (r["status"], r["duration"]) for key, r in records.items()} == {
+        "p1": ("Success", 3.0), "p2": ("Success", 2.0),
+    }
+
+def test_torn_last_line_is_ignored_and_later_appends_stay_readable(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    CheckpointJournal(str(path)).append("p1", {"status": "Success", "duration": 1.0})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "p2", "status": "Succ')
+
+    journal = CheckpointJournal(str(path))
+    assert set(journal.load()) == {"p1"}
+    journal.append("p3", {"status": "Success", "duration": 1.0})
+    assert set(CheckpointJournal(str(path)).load()) == {"p1", "p3"}
+
+def test_pending_skips_programs_that_already_succeeded(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "journal.jsonl"))
+    journal.append("p1", {"status": "Success", "duration": 1.0})
+    journal.append("p2", {"status": "Failed", "duration": 1.0})
+    items = [("p1", "code 1"), ("p2", "code 2"), ("p3", "code 3")]
+
+    assert journal.pending(items) == [("p2", "code 2"), ("p3", "code 3")]
+    journal.reset()
+    assert journal.pending(items) == items
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ..services import command_executor
+from ..services.command_executor import OUTPUT_LIMIT_RETURNCODE, execute_command_async, run_sync
+
+def _python(code):
+    return [sys.executable, "-c", code]
+
+def test_captures_output_and_exit_code():
+    stdout, stderr, returncode, success, truncated = run_sync(
+        execute_command_async(_python("import sys; print(input()); sys.exit(3)"), input_data="hello")
+    )
+    assert (stdout, returncode, success, truncated) == ("hello", 3, False, False)
+
+def test_timeout_kills_the_process():
+    start = time.perf_counter()
+    _, stderr, returncode, success, _ = run_sync(
+        execute_command_async(_python("import time; time.sleep(10)"), timeout=0.3)
+    )
+    assert time.perf_counter() - start < 5
+    assert returncode == -1 and not success
+    assert stderr.startswith("TimeoutExpired")
+
+def test_output_cap_kills_the_process_and_flags_truncation():
+    stdout, stderr, returncode, success, truncated = run_sync(execute_command_async(
+        _python("import sys, time\nwhile True:\n    sys.stdout.write('x' * 4096); sys.stdout.flush()"),
+        timeout=10, max_output_bytes=10000,
+    ))
+    assert truncated and not success
+    assert returncode == OUTPUT_LIMIT_RETURNCODE
+    assert len(stdout) == 10000
+    assert stderr.startswith("OutputLimitExceeded")
+
+def test_cancellation_kills_the_process_and_reraises(tmp_path):
+    pid_file = tmp_path / "pid"
+
+    async def cancel_soon():
+        task = asyncio.ensure_future(execute_command_async(
+            ["sh", "-c", f"echo $$ > {pid_file}; exec sleep 10"], timeout=10
+        ))
+        while not pid_file.exists() or not pid_file.read_text().strip():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run_sync(cancel_soon())
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+def test_concurrency_limit_is_shared_by_threaded_sync_callers():
+    previous = command_executor.default_max_concurrency
+    command_executor.set_max_concurrency(2)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda _: run_sync(execute_command_async(_python("import time; time.sleep(0.5)"))), range(4)
+            ))
+        elapsed = time.perf_counter() - start
+    finally:
+        command_executor.set_max_concurrency(previous)
+
+    assert all(result[3] for result in results)
+    # Four half-second commands, two at a time, need two rounds.
+    assert elapsed >= 1.0
+
+def test_execution_slots_hold_back_commands_until_released():
+    previous = command_executor.default_max_concurrency
+    command_executor.set_max_concurrency(2)
+
+    async def scenario():
+        order = []
+
+        async def holder():
+            async with command_executor.execution_slots(2):
+                order.append("held")
+                await asyncio.sleep(0.3)
+                order.append("released")
+
+        async def command():
+            await asyncio.sleep(0.05)
+            await execute_command_async(_python("pass"))
+            order.append("command")
+
+        await asyncio.gather(holder(), command())
+        return order
+
+    try:
+        order = run_sync(scenario())
+    finally:
+        command_executor.set_max_concurrency(previous)
+    assert order == ["held", "released", "command"]
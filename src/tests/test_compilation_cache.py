@@ -0,0 +1,69 @@
+import os
+import time
+
+from ..services import compilation_cache
+from ..services.compilation_cache import CompilationCache
+
+def _artifact(directory, name, size):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+def _age(cache, key, seconds):
+    entry_dir = cache._entry_dir(key)
+    past = time.time() - seconds
+    os.utime(entry_dir, (past, past))
+
+def test_fetch_miss_then_hit_links_into_destination(tmp_path):
+    cache = CompilationCache(str(tmp_path / "cache"))
+    dest = tmp_path / "sandbox"
+    dest.mkdir()
+    key = CompilationCache.make_key("int main() {}", "g++", [])
+
+    assert not cache.fetch(key, ["program"], str(dest))
+    cache.put(key, _artifact(str(tmp_path), "program", 10))
+    assert cache.fetch(key, ["program"], str(dest))
+
+    assert (dest / "program").read_bytes() == b"x" * 10
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_fetched_copy_survives_eviction(tmp_path):
+    cache = CompilationCache(str(tmp_path / "cache"), min_age=0)
+    dest = tmp_path / "sandbox"
+    dest.mkdir()
+    cache.put("a" * 64, _artifact(str(tmp_path), "program", 10))
+    assert cache.fetch("a" * 64, ["program"], str(dest))
+
+    cache.max_bytes = 0
+    assert cache.evict() == 1
+    assert cache.stats()["entries"] == 0
+    assert (dest / "program").read_bytes() == b"x" * 10
+
+def test_evicts_least_recently_used_once_over_bound(tmp_path):
+    cache = CompilationCache(str(tmp_path / "cache"), max_bytes=25, min_age=60)
+    for key in ("a" * 64, "b" * 64):
+        cache.put(key, _artifact(str(tmp_path), "program", 10))
+    _age(cache, "a" * 64, 120)
+    _age(cache, "b" * 64, 90)
+
+    # Still under the bound: nothing is evicted.
+    assert cache.stats()["entries"] == 2
+    cache.put("c" * 64, _artifact(str(tmp_path), "program", 10))
+
+    assert not os.path.isdir(cache._entry_dir("a" * 64))
+    assert os.path.isdir(cache._entry_dir("b" * 64))
+    assert os.path.isdir(cache._entry_dir("c" * 64))
+
+def test_recently_used_entries_are_not_evicted(tmp_path):
+    cache = CompilationCache(str(tmp_path / "cache"), max_bytes=5, min_age=60)
+    cache.put("a" * 64, _artifact(str(tmp_path), "program", 10))
+    cache.put("b" * 64, _artifact(str(tmp_path), "program", 10))
+
+    assert cache.evict() == 0
+    assert cache.stats()["entries"] == 2
+
+def test_key_includes_compiler_version(monkeypatch):
+    key = CompilationCache.make_key("int main() {}", "g++", [])
+    monkeypatch.setattr(compilation_cache, "compiler_version", lambda compiler: "99.1.0")
+    assert CompilationCache.make_key("int main() {}", "g++", []) != key
@@ -0,0 +1,33 @@
+from ..services.context_compaction import ContextCompactor, review_summary
+
+REVIEW = """Detailed scores:
+```
+Correctness: 9/10 - handles every case
+Readability: 6/10 - nested loops are hard to follow
+Overall: 7/10
+```
+Consider extracting the loop body into a helper.
+"""
+
+def test_review_summary_keeps_overall_low_scores_and_suggestions():
+    assert review_summary(REVIEW).splitlines() == [
+        "Readability: 6/10 - nested loops are hard to follow",
+        "Overall: 7/10",
+        "Consider extracting the loop body into a helper.",
+    ]
+
+def test_review_summary_keeps_text_without_anything_to_drop():
+    assert review_summary("Correctness: 10/10") == "Correctness: 10/10"
+
+def test_compaction_only_applies_to_retries():
+    compactor = ContextCompactor()
+    config = {"compaction": {"review": "review_summary"}}
+    kwargs = {"review": REVIEW, "code": "x = 1"}
+
+    assert compactor.compact("Critic", config, kwargs, None) is kwargs
+    compacted = compactor.compact("Critic", config, kwargs, kwargs)
+
+    assert compacted["code"] == "x = 1"
+    assert compacted["review"] == review_summary(REVIEW)
+    report = compactor.report()["Critic"]
+    assert report["retries"] == 1 and report["tokens_saved"] > 0
@@ -0,0 +1,57 @@
+import copy
+import time
+
+from ..services.llm_response_cache import SqliteResponseCache
+
+def test_entries_older_than_ttl_are_misses_and_evicted(tmp_path):
+    cache = SqliteResponseCache(str(tmp_path / "cache.db"), ttl=0.05)
+    cache.set("old", "reply")
+    assert cache.get("old") == "reply"
+
+    time.sleep(0.1)
+    assert cache.get("old", "missing") == "missing"
+    cache.set("new", "reply")
+
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["evictions"] == 1
+
+def test_least_recently_used_entries_evicted_over_max_bytes(tmp_path):
+    cache = SqliteResponseCache(str(tmp_path / "cache.db"))
+    cache.set("a", "x" * 100)
+    size = cache.stats()["bytes"]
+    cache.max_bytes = 2 * size
+    time.sleep(0.01)
+    cache.set("b", "x" * 100)
+    time.sleep(0.01)
+    cache.get("a")
+    time.sleep(0.01)
+    cache.set("c", "x" * 100)
+
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.get("b") is None
+    assert cache.stats()["bytes"] == 2 * size
+
+def test_replacing_an_entry_keeps_size_total(tmp_path):
+    cache = SqliteResponseCache(str(tmp_path / "cache.db"))
+    cache.set("a", "x" * 100)
+    cache.set("a", "x" * 10)
+    cache.set("b", "x" * 10)
+
+    assert cache._total_bytes == cache.stats()["bytes"]
+    reopened = SqliteResponseCache(str(tmp_path / "cache.db"))
+    assert reopened._total_bytes == cache._total_bytes
+
+def test_read_only_serves_hits_without_writing(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SqliteResponseCache(path).set("a", "reply")
+    cache = SqliteResponseCache(path, read_only=True)
+
+    assert cache.get("a") == "reply"
+    cache.set("b", "reply")
+    assert cache.get("b") is None
+    assert cache.stats()["writes"] == 0 and cache.stats()["entries"] == 1
+
+def test_deepcopy_shares_the_cache(tmp_path):
+    cache = SqliteResponseCache(str(tmp_path / "cache.db"))
+    config = copy.deepcopy({"config_list": [], "cache": cache})
+    assert config["cache"] is cache
@@ -0,0 +1,337 @@
+import gzip
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ..services.multi_agent_workflow_engine import (
+    _build_phase_graph, _failed_phases, create_custom_workflow, run_workflow_batch, run_workflow_pipeline,
+)
+from ..services.shared_workspace import MemoryBackend
+
+class FakeAgent:
+    """Stands in for an autogen assistant; reply(message) produces its answer"""
+
+    def __init__(self, name, reply, delay=0.0):
+        self.name = name
+        self.reply = reply
+        self.delay = delay
+
+class FakeProxy(FakeAgent):
+    """Stands in for the User_Proxy; records every chat it starts"""
+
+    def __init__(self, calls):
+        super().__init__("User_Proxy", None)
+        self.calls = calls
+        self.chats = []
+        self.active = 0
+        self.overlapped = False
+
+    def initiate_chat(self, recipient, message, max_turns):
+        self.calls.append((recipient.name, message))
+        self.chats.append(recipient.name)
+        self.active += 1
+        self.overlapped = self.overlapped or self.active > 1
+        time.sleep(recipient.delay)
+        self.active -= 1
+        return SimpleNamespace(chat_history=[
+            {"name": "User_Proxy", "role": "user", "content": message},
+            {"name": recipient.name, "role": "assistant", "content": recipient.reply(message)},
+        ])
+
+def _phase(agent, context_key, output_key):
+    return {
+        "default_agent": agent,
+        "context_keys": [context_key] if isinstance(context_key, str) else context_key,
+        "output_key": output_key,
+        "prompt_template": "Work on this:\n{value}",
+        "prompt_kwargs": lambda context: {"value": " + ".join(str(v) for v in context.values())},
+        "max_turns": 1,
+        "extract_from_chat": True,
+    }
+
+PHASES = {
+    "A": _phase("Agent_A", "original_cpp_code", "a"),
+    "B": _phase("Agent_B", "a", "b"),
+    "C": _phase("Agent_C", "b", "c"),
+}
+
+# A and B only read the C++ code, so they can run together; C needs both.
+DAG_PHASES = {
+    "A": _phase("Agent_A", "original_cpp_code", "a"),
+    "B": _phase("Agent_B", "original_cpp_code", "b"),
+    "C": _phase("Agent_C", ["a", "b"], "c"),
+}
+
+def _workflow(retry_condition=None, phases=PHASES, **kwargs):
+    retry_config = None
+    if retry_condition is not None:
+        retry_config = {
+            "enabled": True,
+            "max_retries": 2,
+            "retry_conditions": [retry_condition],
+            # Fail the first review of every program only.
+            "condition_handlers": {"review": lambda workspace, condition: workspace.read("c").endswith("#1")},
+        }
+    return create_custom_workflow(
+        agents={},
+        phase_speakers={name: [config["default_agent"]] for name, config in phases.items()},
+        phase_order=list(phases),
+        execution_phases=list(phases),
+        agent_patterns={},
+        agent_access_patterns={},
+        phase_configs=phases,
+        retry_config=retry_config,
+        **kwargs,
+    )[1]
+
+def _agent_builder(calls, delay=0.0, delays=None):
+    reviews = {}
+    lock = threading.Lock()
+
+    def review(message):
+        with lock:
+            reviews[message] = reviews.get(message, 0) + 1
+            return f"{message.splitlines()[-1]} reviewed #{reviews[message]}"
+
+    def build():
+        return {
+            "User_Proxy": FakeProxy(calls),
+            "Agent_A": FakeAgent("Agent_A", lambda m: m.splitlines()[-1] + " -> a", (delays or {}).get("A", delay)),
+            "Agent_B": FakeAgent("Agent_B", lambda m: m.splitlines()[-1] + " -> b", (delays or {}).get("B", delay)),
+            "Agent_C": FakeAgent("Agent_C", review, (delays or {}).get("C", delay)),
+        }
+    return build
+
+def _phases_run(calls, program):
+    return [agent[-1] for agent, message in calls if program in message]
+
+@pytest.mark.parametrize("condition, expected", [
+    ({"type": "review", "workspace_key": "c", "rerun_phases": ["C"]}, ["A", "B", "C", "C"]),
+    # Without rerun_phases the producer of "c" and the phase feeding it re-run.
+    ({"type": "review", "workspace_key": "c"}, ["A", "B", "C", "B", "C"]),
+])
+def test_pipeline_retry_reenters_at_the_first_failed_stage(condition, expected):
+    calls = []
+    run_fn = _workflow(condition)
+    items = [(f"p{i}", f"program {i}") for i in range(3)]
+
+    results = run_workflow_pipeline(run_fn, items, agent_builder=_agent_builder(calls),
+                                    stage_workers={"A": 1, "B": 1, "C": 1})
+
+    for key, cpp_code in items:
+        assert results[key]["error"] is None
+        assert _phases_run(calls, cpp_code) == expected
+        assert results[key]["outputs"]["c"].endswith("#2")
+
+def test_pipeline_duration_excludes_time_queued_before_the_first_stage():
+    calls = []
+    run_fn = _workflow()
+    items = [(f"p{i}", f"program {i}") for i in range(4)]
+
+    results = run_workflow_pipeline(run_fn, items, agent_builder=_agent_builder(calls, delay=0.1),
+                                    stage_workers={"A": 1, "B": 1, "C": 1})
+
+    # Three 0.1s phases each; the last program waits 0.3s for the first stage before that.
+    assert max(result["duration"] for result in results.values()) < 0.45
+
+def test_pipeline_overlaps_programs_across_stages_and_isolates_failures():
+    calls, builds, reported = [], [], []
+    build = _agent_builder(calls, delay=0.1)
+
+    def agent_builder():
+        agents = build()
+        builds.append(agents)
+
+        def reply(message):
+            if "program 2" in message:
+                raise RuntimeError("endpoint down")
+            return message.splitlines()[-1] + " -> b"
+        agents["Agent_B"].reply = reply
+        return agents
+
+    items = [(f"p{i}", f"program {i}") for i in range(4)]
+    start = time.perf_counter()
+    results = run_workflow_pipeline(_workflow(), items, agent_builder=agent_builder,
+                                    stage_workers={"A": 1, "B": 1, "C": 1},
+                                    on_result=lambda key, result: reported.append(key))
+    elapsed = time.perf_counter() - start
+
+    # Twelve 0.1s phases; with the stages overlapping they take about six rounds.
+    assert elapsed < 0.9
+    assert len(builds) == 3
+    assert sorted(reported) == sorted(results) == [key for key, _ in items]
+    assert "endpoint down" in results["p2"]["error"]
+    assert all(results[key]["error"] is None for key in ("p0", "p1", "p3"))
+    assert results["p3"]["outputs"]["c"] == "program 3 -> a -> b reviewed #1"
+
+@pytest.mark.parametrize("with_proxy_builder", [True, False])
+def test_dag_writes_in_phase_order_and_never_shares_a_proxy(with_proxy_builder):
+    calls, proxies, backends = [], [], {}
+
+    def proxy_builder(agents):
+        proxies.append(FakeProxy(calls))
+        return proxies[-1]
+
+    def backend(key):
+        backends[key] = MemoryBackend()
+        return backends[key]
+
+    run_fn = _workflow(phases=DAG_PHASES, workspace_backend=backend,
+                       proxy_builder=proxy_builder if with_proxy_builder else None)
+    # A finishes last, so completion order differs from phase order.
+    agents = _agent_builder(calls, delays={"A": 0.2, "B": 0.0})()
+
+    start = time.perf_counter()
+    _, outputs = run_fn("program 0", "p0", agents=agents)
+    elapsed = time.perf_counter() - start
+
+    store = backends["p0"]
+    assert store.get("a").version < store.get("b").version < store.get("c").version
+    assert outputs["c"] == "program 0 -> a + program 0 -> b reviewed #1"
+    assert not agents["User_Proxy"].overlapped
+    assert not any(proxy.overlapped for proxy in proxies)
+    if with_proxy_builder:
+        # B ran on its own proxy alongside A.
+        assert [proxy.chats for proxy in proxies] == [["Agent_B"]]
+        assert agents["User_Proxy"].chats == ["Agent_A", "Agent_C"]
+        assert elapsed < 0.35
+    else:
+        assert proxies == []
+        assert agents["User_Proxy"].chats == ["Agent_A", "Agent_B", "Agent_C"]
+
+def test_interrupted_batch_reports_programs_in_flight():
+    started = []
+    release = threading.Event()
+
+    def run_fn(cpp_code, key, agents=None):
+        started.append(key)
+        if key != "p0":
+            release.wait(5)
+        return [], {"translated_code": cpp_code}
+
+    reported = {}
+
+    def on_result(key, result):
+        reported[key] = result
+        if key == "p0":
+            # Simulate Ctrl-C while other programs are still in flight.
+            release.set()
+            raise KeyboardInterrupt
+
+    items = [(f"p{i}", f"code {i}") for i in range(5)]
+    with pytest.raises(KeyboardInterrupt):
+        run_workflow_batch(run_fn, items, agent_builder=dict, max_in_flight=3, on_result=on_result)
+
+    # Every program that started is reported; queued ones are dropped.
+    assert set(reported) == set(started)
+    assert len(started) < len(items)
+    assert reported["p1"]["outputs"] == {"translated_code": "code 1"}
+
+def test_retried_phase_sends_compacted_prompt_fields():
+    calls = []
+    seen = []
+
+    def compact(value, previous):
+        seen.append(previous)
+        return "(compacted)"
+
+    phases = dict(PHASES, C={**PHASES["C"], "compaction": {"value": compact}})
+    run_fn = _workflow({"type": "review", "workspace_key": "c", "rerun_phases": ["C"]}, phases=phases)
+
+    run_fn("program 0", "p0", agents=_agent_builder(calls)())
+
+    messages = [message for agent, message in calls if agent == "Agent_C"]
+    assert messages[0] == "Work on this:\nprogram 0 -> a -> b"
+    assert messages[1:] and all(message == "Work on this:\n(compacted)" for message in messages[1:])
+    # The previous attempt's value is the uncompacted one.
+    assert seen[0] == "program 0 -> a -> b"
+    assert run_fn.workflow["context_compactor"].report()["C"]["retries"] == len(messages) - 1
+
+# Translate -> Test -> Review, where Translate also reads the review of the previous attempt.
+FEEDBACK_PHASES = {
+    "Translate": _phase("Agent_A", ["original_cpp_code", "review"], "code"),
+    "Test": _phase("Agent_B", "code", "results"),
+    "Review": _phase("Agent_C", ["code", "results"], "review"),
+}
+
+def test_phase_graph_ignores_feedback_keys_and_orders_overwrites():
+    graph = _build_phase_graph(list(FEEDBACK_PHASES), FEEDBACK_PHASES)
+
+    assert graph["upstream"] == {"Translate": [], "Test": ["Translate"], "Review": ["Translate", "Test"]}
+    # Review overwrites the key Translate read, so it also waits for Translate.
+    assert graph["wait_for"] == {"Translate": set(), "Test": {"Translate"}, "Review": {"Translate", "Test"}}
+
+def test_dag_wave_never_gives_one_agent_two_phases():
+    calls, proxies = [], []
+
+    def proxy_builder(agents):
+        proxies.append(FakeProxy(calls))
+        return proxies[-1]
+
+    # A and B are independent but both belong to Agent_A.
+    phases = dict(DAG_PHASES, B={**DAG_PHASES["B"], "default_agent": "Agent_A"})
+    run_fn = _workflow(phases=phases, proxy_builder=proxy_builder)
+    agents = _agent_builder(calls, delay=0.1)()
+
+    start = time.perf_counter()
+    _, outputs = run_fn("program 0", "p0", agents=agents)
+
+    assert time.perf_counter() - start >= 0.3
+    assert proxies == []
+    assert agents["User_Proxy"].chats == ["Agent_A", "Agent_A", "Agent_C"]
+    assert outputs["c"] == "program 0 -> a + program 0 -> a reviewed #1"
+
+@pytest.mark.parametrize("conditions, expected", [
+    ([{"workspace_key": "review", "rerun_phases": ["Translate"]}], {"Translate"}),
+    ([{"workspace_key": "results"}], {"Test", "Translate"}),
+    ([{"workspace_key": "review"}], {"Review", "Translate", "Test"}),
+    ([{"workspace_key": "results"}, {"workspace_key": "not_produced"}], {"Translate", "Test", "Review"}),
+])
+def test_failed_phases_cover_the_judged_artifact(conditions, expected):
+    workflow = {"execution_phases": list(FEEDBACK_PHASES), "graph": _build_phase_graph(list(FEEDBACK_PHASES), FEEDBACK_PHASES)}
+    assert _failed_phases(workflow, conditions) == expected
+
+def test_retry_skips_phases_whose_inputs_did_not_change():
+    calls = []
+    run_fn = _workflow({"type": "review", "workspace_key": "c", "rerun_phases": ["C"]})
+
+    run_fn("program 0", "p0", agents=_agent_builder(calls)())
+
+    # Only the failed review re-runs; A and B see the same inputs as before.
+    assert _phases_run(calls, "program 0") == ["A", "B", "C", "C"]
+
+def test_spilled_chat_history_is_written_per_program(tmp_path):
+    calls = []
+    run_fn = _workflow(history_sink=f"spill:{tmp_path}")
+
+    chat_history, outputs = run_fn("program 0", "p0", agents=_agent_builder(calls)())
+
+    assert chat_history == []
+    with gzip.open(tmp_path / "p0.jsonl.gz", "rt", encoding="utf-8") as f:
+        spilled = [json.loads(line) for line in f]
+    assert [m["name"] for m in spilled] == ["User_Proxy", "Agent_A", "User_Proxy", "Agent_B", "User_Proxy", "Agent_C"]
+    assert spilled[-1]["content"] == outputs["c"]
+
+def test_conclusive_pre_check_replaces_the_chat():
+    calls = []
+    checked = []
+
+    def pre_check(context):
+        checked.append(dict(context))
+        return "checked locally" if "program 0" in context["a"] else None
+
+    phases = dict(PHASES, B={**PHASES["B"], "pre_check": pre_check})
+    run_fn = _workflow(phases=phases)
+    agents = _agent_builder(calls)()
+
+    _, first = run_fn("program 0", "p0", agents=agents)
+    _, second = run_fn("program 1", "p1", agents=agents)
+
+    assert checked == [{"a": "program 0 -> a"}, {"a": "program 1 -> a"}]
+    assert first["b"] == "checked locally" and first["c"] == "checked locally reviewed #1"
+    # Inconclusive for program 1: its agent runs as usual.
+    assert second["b"] == "program 1 -> a -> b"
+    assert [agent for agent, _ in calls] == ["Agent_A", "Agent_C", "Agent_A", "Agent_B", "Agent_C"]
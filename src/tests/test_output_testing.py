@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from ..services import command_executor, output_testing
+from ..services.compilation_cache import CompilationCache
+
+requires_gpp = pytest.mark.skipif(output_testing.GPP_PATH is None, reason="g++ not available")
+
+LEGACY_CPP = """
+#include <iostream>
+int add(int a, int b) { return a + b; }
+"""
+
+CPP_TESTS = """
+void test_add() { std::cout << add(1, 2) << std::endl; }
+void test_helper_x(int k) { std::cout << k << std::endl; }
+void test_negative() { std::cout << add(-1, -2) << std::endl; }
+"""
+
+PY_CODE = """
+def add(a, b):
+    return a + b
+"""
+
+PY_TESTS = """
+def test_add():
+    print(add(1, 2))
+
+def test_helper_x():
+    print(0)
+
+def test_negative():
+    print(add(-1, -2))
+"""
+
+@pytest.fixture(autouse=True)
+def private_compile_cache(tmp_path):
+    previous = output_testing.compile_cache
+    output_testing.set_compile_cache(CompilationCache(str(tmp_path / "cache")))
+    yield
+    output_testing.set_compile_cache(previous)
+
+@requires_gpp
+def test_dispatch_driver_runs_each_test_by_name():
+    cpp_tests = CPP_TESTS.replace("void test_helper_x(int k) { std::cout << k << std::endl; }\n", "")
+    results = output_testing.run_cpp_tests(cpp_tests, ["test_add", "test_negative"], header_code=LEGACY_CPP)
+    assert results["test_add"]["stdout"] == "3"
+    assert results["test_negative"]["stdout"] == "-3"
+
+@requires_gpp
+def test_dispatch_build_failure_falls_back_to_per_test_builds():
+    results = output_testing.run_cpp_tests(CPP_TESTS, ["test_add", "test_helper_x", "test_negative"],
+                                           header_code=LEGACY_CPP)
+    assert results["test_add"]["success"] and results["test_add"]["stdout"] == "3"
+    assert results["test_negative"]["success"] and results["test_negative"]["stdout"] == "-3"
+    assert not results["test_helper_x"]["success"]
+
+@requires_gpp
+@pytest.mark.parametrize("compile_once", [True, False])
+def test_uncallable_test_only_fails_itself(compile_once):
+    summary = output_testing.run_and_compare_tests(
+        LEGACY_CPP, PY_CODE, CPP_TESTS, PY_TESTS, compile_once=compile_once, warm_python=False
+    )
+    assert summary["total"] == 3
+    assert summary["passed"] == 2
+    assert [d["name"] for d in summary["details"] if not d["passed"]] == ["test_helper_x"]
+
+@requires_gpp
+def test_repeated_test_build_hits_the_compilation_cache():
+    cpp_tests = CPP_TESTS.replace("void test_helper_x(int k) { std::cout << k << std::endl; }\n", "")
+    first = output_testing.run_cpp_tests(cpp_tests, ["test_add", "test_negative"], header_code=LEGACY_CPP)
+    hits = output_testing.compile_cache.stats()["hits"]
+    second = output_testing.run_cpp_tests(cpp_tests, ["test_add", "test_negative"], header_code=LEGACY_CPP)
+
+    # Precompiled header and test executable are both reused.
+    assert output_testing.compile_cache.stats()["hits"] == hits + 2
+    assert {k: r["stdout"] for k, r in second.items()} == {k: r["stdout"] for k, r in first.items()}
+
+@requires_gpp
+@pytest.mark.parametrize("compile_once", [True, False])
+def test_cpp_runs_are_bounded_and_details_keep_declaration_order(monkeypatch, compile_once):
+    names = [f"test_case_{i}" for i in range(6)]
+    cpp_tests = "".join(f"void {name}() {{ std::cout << {i} << std::endl; }}\n" for i, name in enumerate(names))
+    py_tests = "".join(f"def {name}():\n    print({i})\n" for i, name in enumerate(names))
+    running, peak = [0], [0]
+    run_executable = output_testing._run_cpp_executable_async
+
+    async def tracked_run(execute_command, *args, **kwargs):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        try:
+            # Later tests finish first, so completion order differs from declaration order.
+            await asyncio.sleep(0.02 * (len(names) - names.index(execute_command[-1])) if compile_once else 0.05)
+            return await run_executable(execute_command, *args, **kwargs)
+        finally:
+            running[0] -= 1
+
+    monkeypatch.setattr(output_testing, "_run_cpp_executable_async", tracked_run)
+    summary = output_testing.run_and_compare_tests(
+        LEGACY_CPP, PY_CODE, cpp_tests, py_tests, compile_once=compile_once, max_workers=2, warm_python=False
+    )
+
+    assert summary["passed"] == len(names)
+    assert [d["name"] for d in summary["details"]] == names
+    assert peak[0] <= 2
+
+@requires_gpp
+def test_warm_python_run_holds_execution_slots(monkeypatch):
+    previous = command_executor.default_max_concurrency
+    command_executor.set_max_concurrency(2)
+    seen = {}
+
+    def fake_run_python_tests(code_string, test_names, max_parallel=1):
+        slots = command_executor._global_slots
+        seen["slot_free"] = slots.acquire(blocking=False)
+        if seen["slot_free"]:
+            slots.release()
+        seen["max_parallel"] = max_parallel
+        stdout = {"test_add": "3", "test_helper_x": "0", "test_negative": "-3"}
+        return {name: {"stdout": stdout[name], "returncode": 0, "success": True} for name in test_names}
+
+    monkeypatch.setattr(output_testing, "run_python_tests", fake_run_python_tests)
+    monkeypatch.setattr(output_testing.PythonWorkerPool, "is_supported", staticmethod(lambda: True))
+    try:
+        summary = output_testing.run_and_compare_tests(
+            LEGACY_CPP, PY_CODE, CPP_TESTS, PY_TESTS, max_workers=2, warm_python=True
+        )
+    finally:
+        command_executor.set_max_concurrency(previous)
+
+    assert summary["passed"] == 2
+    assert seen == {"slot_free": False, "max_parallel": 2}
+
+def test_shard_killed_mid_write_reports_unfinished_tests_as_timeouts():
+    # Records test_a, then dies halfway through test_b's line.
+    program = """
+import json, os, time
+with open(os.environ["CT_RESULTS_PATH"], "a") as f:
+    f.write(json.dumps({"id": "A.test_a", "outcome": "passed", "duration": 0.0}) + "\\n")
+    f.write('{"id": "A.test_b", "outc')
+    f.flush()
+    time.sleep(10)
+"""
+    shard = command_executor.run_sync(output_testing._run_python_test_shard_async(
+        program, ["A.test_a", "A.test_b"], timeout=0.5
+    ))
+
+    assert shard["timed_out"]
+    assert [(t["id"], t["outcome"]) for t in shard["tests"]] == [("A.test_a", "passed"), ("A.test_b", "timeout")]
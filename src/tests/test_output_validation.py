@@ -0,0 +1,15 @@
+from ..services.output_validation import validation_fast_path
+
+def test_valid_code_needs_no_validator():
+    summary = validation_fast_path("def add(a, b):\n    return a + b\n")
+    assert summary.splitlines()[1:] == [
+        "- Syntax Errors: None", "- Compilation Issues: None", "- Structural Problems: None",
+    ]
+
+def test_syntax_error_is_reported_with_its_line():
+    summary = validation_fast_path("def add(a, b)\n    return a + b\n")
+    assert "- Syntax Errors: SyntaxError:" in summary and "at line 1" in summary
+    assert "- Compilation Issues: Code does not compile" in summary
+
+def test_missing_code_is_a_structural_problem():
+    assert validation_fast_path("  \n").endswith("- Structural Problems: No Python code was produced")
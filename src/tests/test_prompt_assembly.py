@@ -0,0 +1,53 @@
+from ..services.prompt_assembly import PromptAssembler, estimate_tokens, split_template
+
+TEMPLATE = (
+    "You translate C++ to Python.\n"
+    "Review of the last attempt:\n{critic_review}\n"
+    "C++ code:\n{original_cpp_code}\n"
+    "Reply with one code block."
+)
+
+def test_split_template_separates_instructions_sections_and_tail():
+    instructions, sections, tail = split_template(TEMPLATE)
+
+    assert instructions == "You translate C++ to Python.\n"
+    assert sections == [("Review of the last attempt:\n", "critic_review"), ("\nC++ code:\n", "original_cpp_code")]
+    assert tail == "\nReply with one code block."
+
+def test_section_order_puts_stable_inputs_first():
+    config = {"prompt_template": TEMPLATE, "section_order": ["original_cpp_code", "critic_review"]}
+    message = PromptAssembler().assemble("TRANSLATION", config, {"critic_review": "R", "original_cpp_code": "C"})
+
+    assert message == (
+        "You translate C++ to Python.\n"
+        "\nC++ code:\nC"
+        "Review of the last attempt:\nR"
+        "\nReply with one code block."
+    )
+
+def test_budget_truncates_sections_in_truncate_order():
+    review = "review line\n" * 400
+    config = {
+        "prompt_template": TEMPLATE,
+        "token_budget": 200,
+        "truncate_order": ["critic_review"],
+    }
+    assembler = PromptAssembler()
+    message = assembler.assemble("TRANSLATION", config, {"critic_review": review, "original_cpp_code": "int x;"})
+
+    assert "int x;" in message and "tokens truncated" in message
+    assert message.startswith("You translate C++ to Python.\nReview of the last attempt:\nreview line")
+    assert estimate_tokens(message) <= 200 + estimate_tokens("\n... [0000 tokens truncated] ...\n")
+    assert assembler.report()["TRANSLATION"]["truncated_calls"] == 1
+
+def test_report_counts_prefix_shared_with_the_previous_prompt():
+    config = {"prompt_template": TEMPLATE, "section_order": ["original_cpp_code", "critic_review"]}
+    assembler = PromptAssembler()
+    assembler.assemble("TRANSLATION", config, {"critic_review": "first", "original_cpp_code": "int x;"}, "Translator")
+    assembler.assemble("TRANSLATION", config, {"critic_review": "second", "original_cpp_code": "int x;"}, "Translator")
+
+    report = assembler.report()["TRANSLATION"]
+    assert report["calls"] == 2
+    # Only the second prompt has a predecessor; it shares everything up to the review.
+    shared = "You translate C++ to Python.\n\nC++ code:\nint x;Review of the last attempt:\n"
+    assert report["avg_shared_prefix_tokens"] == estimate_tokens(shared) / 2
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+from ..services import output_testing
+from ..services.python_worker_pool import PythonWorkerPool
+
+pytestmark = pytest.mark.skipif(not PythonWorkerPool.is_supported(), reason="fork servers need os.fork")
+
+PROBE_CODE = """
+import os, sys
+def probe():
+    print(sys.executable)
+    print(os.path.basename(sys.path[0]))
+"""
+
+def _cold(code, name):
+    return output_testing.run_python_code(output_testing._build_python_test_program(code, "", name))
+
+def test_warm_and_cold_runs_use_the_same_interpreter_and_sys_path():
+    warm = output_testing.run_python_tests(PROBE_CODE, ["probe"])["probe"]
+    cold = _cold(PROBE_CODE, "probe")
+
+    assert warm["success"] and cold["success"]
+    warm_executable, warm_path0 = warm["stdout"].splitlines()
+    cold_executable, cold_path0 = cold["stdout"].splitlines()
+    assert warm_executable == cold_executable == sys.executable
+    assert warm_path0 != "services"
+    assert warm_path0.startswith("worker-") and cold_path0.startswith("worker-")
+
+def test_warm_tests_cannot_import_modules_next_to_the_fork_server():
+    code = "def imports_server_module():\n    import python_worker_pool\n"
+    assert os.path.isfile(os.path.join(os.path.dirname(output_testing.__file__), "python_worker_pool.py"))
+
+    warm = output_testing.run_python_tests(code, ["imports_server_module"])["imports_server_module"]
+    cold = _cold(code, "imports_server_module")
+
+    assert not cold["success"] and not warm["success"]
+    assert "ModuleNotFoundError" in warm["stderr"]
@@ -0,0 +1,44 @@
+import os
+
+from ..services.compilation_cache import CompilationCache
+from ..services.sandbox_pool import SandboxPool
+
+def test_released_sandbox_is_emptied_and_reused(tmp_path):
+    pool = SandboxPool(size=1, base_dir=str(tmp_path))
+    with pool.sandbox() as first:
+        os.makedirs(os.path.join(first, "build", "obj"))
+        with open(os.path.join(first, "program.py"), "w") as f:
+            f.write("print(1)")
+
+    with pool.sandbox() as second:
+        assert second == first
+        assert os.listdir(second) == []
+
+def test_busy_pool_grows_and_keeps_at_most_size_idle(tmp_path):
+    pool = SandboxPool(size=2, base_dir=str(tmp_path))
+    held = [pool.acquire() for _ in range(4)]
+    assert len(set(held)) == 4
+
+    for path in held:
+        pool.release(path)
+    assert sum(os.path.isdir(path) for path in held) == 2
+
+    pool.close()
+    assert not os.path.exists(pool.root)
+
+def test_reset_of_a_cached_artifact_keeps_the_cache_entry(tmp_path):
+    pool = SandboxPool(size=1, base_dir=str(tmp_path / "pool"))
+    cache = CompilationCache(str(tmp_path / "cache"))
+    key = CompilationCache.make_key("int main() {}", "g++", [])
+    with pool.sandbox() as build:
+        artifact = os.path.join(build, "program")
+        with open(artifact, "wb") as f:
+            f.write(b"binary")
+        cache.put(key, artifact)
+
+    # The hardlinked copy in the sandbox is removed on release; the cached one stays.
+    for _ in range(2):
+        with pool.sandbox() as run:
+            assert cache.fetch(key, ["program"], run)
+            with open(os.path.join(run, "program"), "rb") as f:
+                assert f.read() == b"binary"
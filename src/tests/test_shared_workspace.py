@@ -0,0 +1,95 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from ..services.shared_workspace import MemoryBackend, SharedWorkspace, SqliteBackend, WorkspaceBackend
+
+def _sqlite_workspace(path, namespace="program"):
+    return SharedWorkspace("test", backend=SqliteBackend(str(path), namespace))
+
+def _increment(path, times):
+    workspace = _sqlite_workspace(path)
+    for _ in range(times):
+        while True:
+            entry = workspace.entry("counter")
+            if workspace.compare_and_set("counter", entry.version, entry.value + 1, f"worker-{os.getpid()}"):
+                break
+
+def test_backend_without_every_method_cannot_be_created():
+    class ReadOnlyBackend(WorkspaceBackend):
+        def revision(self):
+            return 0
+
+    with pytest.raises(TypeError):
+        ReadOnlyBackend()
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_compare_and_set_rejects_a_stale_version(tmp_path, backend):
+    if backend == "memory":
+        shared = MemoryBackend()
+        first, second = SharedWorkspace("test", backend=shared), SharedWorkspace("test", backend=shared)
+    else:
+        first, second = _sqlite_workspace(tmp_path / "ws.db"), _sqlite_workspace(tmp_path / "ws.db")
+
+    assert first.compare_and_set("review", 0, "first draft", "Critic")
+    assert not second.compare_and_set("review", 0, "competing draft", "Critic")
+
+    version = second.entry("review").version
+    assert first.compare_and_set("review", version, "second draft", "Critic")
+    assert not second.compare_and_set("review", version, "stale update", "Critic")
+    assert second.read("review") == "second draft"
+
+def test_sqlite_namespaces_are_isolated(tmp_path):
+    first = _sqlite_workspace(tmp_path / "ws.db", "p1")
+    second = _sqlite_workspace(tmp_path / "ws.db", "p2")
+    first.write("translated_code", "print(1)", "Code_Translator")
+
+    assert second.read("translated_code") is None
+    assert second.compare_and_set("translated_code", 0, "print(2)", "Code_Translator")
+    assert first.read("translated_code") == "print(1)"
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_sqlite_compare_and_set_is_atomic_across_processes(tmp_path):
+    path = tmp_path / "ws.db"
+    _sqlite_workspace(path).write("counter", 0, "System")
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_increment, args=(path, 25)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert _sqlite_workspace(path).read("counter") == 100
+
+def test_sqlite_entries_keep_wall_clock_timestamps(tmp_path):
+    before = time.time()
+    _sqlite_workspace(tmp_path / "ws.db").write("requirements", "Title: add", "Requirement_Engineer")
+    after = time.time()
+
+    entry = _sqlite_workspace(tmp_path / "ws.db").entry("requirements")
+    assert before <= entry.timestamp <= after
+
+def test_memory_snapshots_keep_their_revision_while_writes_append():
+    backend = MemoryBackend()
+    workspace = SharedWorkspace("test", backend=backend)
+    workspace.write("code", "v1", "Code_Translator")
+    before = workspace.snapshot()
+    table = backend._table
+
+    workspace.write("code", "v2", "Code_Translator")
+    workspace.write("review", "ok", "Critic")
+    after = workspace.snapshot()
+
+    # Writes append to the key's versions instead of copying the table.
+    assert backend._table is table
+    assert (before.read("code"), before.read("review"), before.keys()) == ("v1", None, ["code"])
+    assert (after.read("code"), after.read("review"), after.keys()) == ("v2", "ok", ["code", "review"])
+    assert after.version("code") == 2 and before.version("code") == 1
+
+    backend.clear()
+    assert workspace.read("code") is None and workspace.snapshot().keys() == []
+    assert after.get_all_outputs() == {"code": "v2", "review": "ok"}
@@ -0,0 +1,39 @@
+from ..services.agent_helpers import extract_relevant_outputs
+from ..services.streaming_reply import BlockExtractor
+
+PATTERN = r"```(python|py|python3)\n(.*?)```"
+
+REPLY = (
+    "Translation:\n```python\ndef add(a, b):\n    return a + b\n```\n"
+    "Usage:\n```python\nprint(add(1, 2))\n```\n"
+)
+
+def _stream(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_stream_stops_after_first_block_and_extraction_agrees():
+    extractor = BlockExtractor(PATTERN)
+    for chunk in _stream(REPLY):
+        if extractor.feed(chunk):
+            break
+
+    assert extractor.complete
+    assert "print(add(1, 2))" not in extractor.text
+    streamed = extract_relevant_outputs([{"content": extractor.text}], {"Code_Translator": PATTERN})
+    full = extract_relevant_outputs([{"content": REPLY}], {"Code_Translator": PATTERN})
+    assert streamed == full == {"Code_Translator": ["def add(a, b):\n    return a + b\n"]}
+
+def test_incomplete_block_does_not_stop_the_stream():
+    extractor = BlockExtractor(PATTERN)
+    assert not extractor.feed("```python\ndef add(a, b):\n")
+    assert not extractor.feed("    return a + b\n``")
+    assert extractor.feed("`\n")
+
+def test_extraction_uses_the_most_recent_matching_message():
+    history = [
+        {"content": "```python\nold = 1\n```"},
+        {"content": REPLY},
+        {"content": "Looks good."},
+    ]
+    outputs = extract_relevant_outputs(history, {"Code_Translator": PATTERN, "Critic": r"no match here"})
+    assert outputs == {"Code_Translator": ["def add(a, b):\n    return a + b\n"], "Critic": []}